@@ -20,9 +20,11 @@ def generate_answer_qwen(user_prompt: str, system_prompt: str, pipe: TextGenerat
     return output.split('Assistant:', 1)[1].strip() # takes only the portion of the text after the "Assistant: "
   
 
-def generate_rag_prompt(retrieved_context: str, cypher_query: str) -> str:
+def generate_rag_prompt(retrieved_context: str, cypher_query: str, truncated: bool = False) -> str:
     # takes the cypher query and retrieved context and creates a system prompt
     # positive examples are added as well as clear instructions
+    # a cut off context gets a note, so that the answer model does not claim that the rows are complete
+    truncation = "The retrieved context was cut off, the query has more rows than are shown." if truncated else ""
     return """
 
     You are a highly intelligent assistant. Your job is to answer user questions using *only* the information from the retrieved context provided from a Neo4j knowledge graph database. If appropriate, add a small python example for the retrieved context, but no cypher queries. Only add this Python code if it is appropriate for the question.  
@@ -33,6 +35,7 @@ def generate_rag_prompt(retrieved_context: str, cypher_query: str) -> str:
     {cypher_query}
     Retrieved Context: 
     {retrieved_context}
+    {truncation}
 
     ### Example 1: 
     Q: What methods does AromaticSubstructure have?
@@ -42,7 +45,7 @@ def generate_rag_prompt(retrieved_context: str, cypher_query: str) -> str:
     - __init__: Constructs an empty <tt>AromaticSubstructure</tt> instance.
     - __init__: Construct a <tt>AromaticSubstructure</tt> instance that consists of the aromatic atoms and bonds of the molecular graph <em>molgraph</em>.
     - perceive: Replaces the currently stored atoms and bonds by the set of aromatic atoms and bonds of the molecular graph <em>molgraph</em>.
-    """.format(retrieved_context = retrieved_context, cypher_query = cypher_query) 
+    """.format(retrieved_context = retrieved_context, cypher_query = cypher_query, truncation = truncation) 
            
 
     
\ No newline at end of file
@@ -2,11 +2,15 @@ import os
 os.environ['HF_HOME'] = os.getenv("MODEL_LOCATION")
 os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "expandable_segments:True"
 
-from utils.rag_utils import initialize_neo4j, get_kg_schema, get_pipeline_from_model
-from retriever import retrieve_context
+from utils.rag_utils import get_kg_schema, get_pipeline_from_model
+from utils.driver_manager import get_driver, warm_up_driver
+from utils.query_cache import query_cache
+from utils.answer_cache import get_answer_cache, is_cacheable
+from retriever import retrieve_context, generate_cypher_query_prompt, get_router_stats, QUESTION_TEMPLATES
 from generator import generate_rag_prompt, generate_answer_qwen
 import json
 import re 
+import hashlib
 from transformers.pipelines.text_generation import TextGenerationPipeline
 import argparse
 
@@ -14,21 +18,41 @@ import argparse
 # https://medium.com/@silviaonofrei/code-llamas-knowledge-of-neo4j-s-cypher-query-language-54783d2ad421
 
 
-def question_rag(user_prompt: str, pipe_cypher: TextGenerationPipeline, pipe_answer: TextGenerationPipeline) -> tuple[str, str]:
+def get_prompt_version(schema: str) -> str:
+    # hash of the prompt and question templates, so that stored answers are not reused after the prompts or templates were changed
+    prompts = generate_cypher_query_prompt(schema) + generate_rag_prompt("", "", truncated=True) + json.dumps(QUESTION_TEMPLATES)
+    return hashlib.sha256(prompts.encode()).hexdigest()
+
+
+def question_rag(user_prompt: str, pipe_cypher: TextGenerationPipeline, pipe_answer: TextGenerationPipeline, 
+                 use_cache: bool = True) -> tuple[str, str]:
     # function to pass a user prompt to the Graph RAG system
-    driver = initialize_neo4j() # initialize the neo4j driver to communicate with the Knowledge Graph
+    driver = get_driver() # the pooled neo4j driver of the process to communicate with the Knowledge Graph
     schema = get_kg_schema() # get the KG schema 
+    cache_key = None
+    answer_cache = get_answer_cache() if use_cache else None
+    if answer_cache: # a repeated question is answered from the answer cache without running the models
+        query_cache.check_version(driver) # the graph version is read at most every few seconds
+        cache_key = answer_cache.get_key(user_prompt, pipe_cypher.model.name_or_path, pipe_answer.model.name_or_path, 
+                                         get_prompt_version(schema), query_cache.graph_version)
+        cached = answer_cache.get(cache_key)
+        if cached is not None:
+            return cached
     try: 
-        query_result, cypher_query = retrieve_context(driver, user_prompt, pipe_cypher, schema)
+        query_result, cypher_query, truncated = retrieve_context(driver, user_prompt, pipe_cypher, schema)
     except Exception as e: 
         print("Exception while retrieving context: ", e)
         query_result = "Context could not be retrieved" # if there is an exception, the query was not functional
         cypher_query = "None" # set it to None to flag for non-runnable queries during benchmarking 
+        truncated = False
         
-    system_prompt_rag = generate_rag_prompt(query_result, cypher_query) # get the final system prompt for the rag
+    system_prompt_rag = generate_rag_prompt(query_result, cypher_query, truncated) # get the final system prompt for the rag
 
     final_answer = generate_answer_qwen(user_prompt, system_prompt_rag, pipe_answer) # generate the final answer 
 
+    if cache_key and is_cacheable(cypher_query, query_result):
+        answer_cache.put(cache_key, user_prompt, cypher_query, query_result, final_answer)
+
     return cypher_query, query_result, final_answer
 
 
@@ -51,7 +75,7 @@ def benchmark_rag(pipe_cypher: TextGenerationPipeline, pipe_answer: TextGenerati
     for i in range(0, 100): 
         benchmark = []
         for question in parsed_questions:
-            cypher_query, query_result, final_answer = question_rag(question["Question"], pipe_cypher, pipe_answer)
+            cypher_query, query_result, final_answer = question_rag(question["Question"], pipe_cypher, pipe_answer, use_cache=False) # every run has to generate new answers
             benchmark.append({"user_prompt": question["Question"], "cypher_query": cypher_query, 
                               "retrieved_context": query_result, 
                                 "final_answer": final_answer,
@@ -72,6 +96,9 @@ def benchmark_rag(pipe_cypher: TextGenerationPipeline, pipe_answer: TextGenerati
         with open(f"/data/shared/projects/graphRAG/graphRAG/graphRAG/benchmark_results/benchmark_results_{i+1}.json", "w") as file:
             json.dump(benchmark, file, indent=4)
 
+    print("Query cache: ", query_cache.get_stats())
+    print("Cypher templates: ", get_router_stats())
+
 
 if __name__ == "__main__":
     model_cypher = "codellama/CodeLlama-13b-Instruct-hf"
@@ -82,6 +109,8 @@ if __name__ == "__main__":
     
     pipe_answer = get_pipeline_from_model(model_answer)
 
+    warm_up_driver() # fails early if the Knowledge Graph cannot be reached
+
     parser = argparse.ArgumentParser(description="CDPKit Graph RAG: Ask a question via command line")
 
     parser.add_argument(
@@ -1,7 +1,10 @@
 from dash import Dash, dcc, html, Input, Output, State, callback_context
 import dash_bootstrap_components as dbc
 from graphRAG import question_rag
+import os
 from utils.rag_utils import get_pipeline_from_model
+from utils.driver_manager import warm_up_driver
+from utils.entity_index import get_entity_index
 
 # Load models globally to ensure they are loaded only once
 model_cypher = "codellama/CodeLlama-13b-Instruct-hf"
@@ -10,6 +13,10 @@ model_answer = "Qwen/Qwen2.5-7B-Instruct"
 pipe_cypher = get_pipeline_from_model(model_cypher)
 pipe_answer = get_pipeline_from_model(model_answer)
 
+# Open the Neo4j connections and load the entity names at startup, so the first questions do not wait for them
+driver = warm_up_driver(int(os.getenv("NEO4j_WARM_CONNECTIONS", "2")))
+get_entity_index(driver)
+
 
 # Initialize app with suppressed callback exceptions
 app = Dash(__name__, external_stylesheets=[dbc.themes.FLATLY], suppress_callback_exceptions=True)
@@ -1,15 +1,140 @@
 from utils.rag_utils import run_query
+from utils.entity_index import get_entity_index
+from utils.cypher_validator import cypher_validator
 from neo4j import Driver
 from transformers.pipelines.text_generation import TextGenerationPipeline
+import re
+import json
+import threading
 
+# questions of a few common shapes are translated into parameterized cypher queries without CodeLlama
+# every template is (name, question pattern, labels of the captured names, cypher query with one parameter per captured name)
+# the more specific patterns come first, a template only matches if all captured names are found in the entity index
+QUESTION_TEMPLATES = [
+    ("parameter type",
+     r"what type is (?:the )?parameter (\w+) of (?:the )?(?:function|method) (\w+)",
+     [("Parameter", "parameter_name"), ("Function", "function_name")],
+     "MATCH (f:Function {name: $function_name})-[:HAS]->(p:Parameter {name: $parameter_name}) OPTIONAL MATCH (p)-[:OF_TYPE]->(t:Class) RETURN p.type, t.name"),
+    ("parameter default",
+     r"does (?:the )?parameter (\w+) of (?:the )?(?:function|method) (\w+) have a default",
+     [("Parameter", "parameter_name"), ("Function", "function_name")],
+     "MATCH (f:Function {name: $function_name})-[:HAS]->(p:Parameter {name: $parameter_name}) RETURN p.default"),
+    ("parameter of function",
+     r"parameter (\w+) of (?:the )?(?:function|method) (\w+)",
+     [("Parameter", "parameter_name"), ("Function", "function_name")],
+     "MATCH (f:Function {name: $function_name})-[:HAS]->(p:Parameter {name: $parameter_name}) RETURN p.name, p.comment, p.default, p.type"),
+    ("functions of parameter",
+     r"in (?:what|which) functions does (?:the )?parameter (\w+) appear",
+     [("Parameter", "parameter_name")],
+     "MATCH (p:Parameter {name: $parameter_name})<-[:HAS]-(f:Function) RETURN f.name, f.comment"),
+    ("method of class",
+     r"(?:method|function) (\w+) of (?:the )?class (\w+)",
+     [("Function", "function_name"), ("Class", "class_name")],
+     "MATCH (c:Class {name: $class_name})-[:HAS]->(f:Function {name: $function_name}) RETURN f.name, f.comment, f.parameter, f.returns"),
+    ("methods of class",
+     r"(?:what|which) (?:methods|functions) does (?:the )?class (\w+) have",
+     [("Class", "class_name")],
+     "MATCH (c:Class {name: $class_name})-[:HAS]->(f:Function) RETURN f.name, f.comment"),
+    ("base classes",
+     r"(?:what|which) class(?:es)? does (?:the )?class (\w+) inherit from",
+     [("Class", "class_name")],
+     "MATCH (c:Class {name: $class_name})-[:INHERITS_FROM]->(p:Class) RETURN p.name"),
+    ("parameter count",
+     r"how many parameters does (?:the )?(?:function |method )?(\w+) take",
+     [("Function", "function_name")],
+     "MATCH (f:Function {name: $function_name})-[:HAS]->(p:Parameter) RETURN COUNT(p)"),
+    ("parameters of function",
+     r"(?:what|which) parameters does (?:the )?(?:function |method )?(\w+) take",
+     [("Function", "function_name")],
+     "MATCH (f:Function {name: $function_name})-[:HAS]->(p:Parameter) RETURN p.name, p.comment, p.default, p.type"),
+    ("function returns",
+     r"what (?:type )?does (?:the )?(?:function |method )?(\w+) return",
+     [("Function", "function_name")],
+     "MATCH (f:Function {name: $function_name}) RETURN f.returns"),
+    ("class attributes",
+     r"attributes? (?:\w+ )?of (?:the )?class (\w+)",
+     [("Class", "class_name")],
+     "MATCH (c:Class {name: $class_name}) RETURN c.attributes"),
+    ("class usage",
+     r"(?:use|initialize|assign|with) (?:an instance of )?(?:the )?class (\w+)",
+     [("Class", "class_name")],
+     "MATCH (c:Class {name: $class_name})-[:HAS]->(f:Function) RETURN c.name, c.comment, f.name, f.comment"),
+    ("class comment",
+     r"(?:tell me about|what does|what is) (?:the )?class (\w+)",
+     [("Class", "class_name")],
+     "MATCH (c:Class {name: $class_name}) RETURN c.comment"),
+    ("files of folder",
+     r"(?:what|which) files are (?:included )?in (?:the )?folder (\w+)",
+     [("Folder", "folder_name")],
+     "MATCH (f:File)-[:INCLUDED_IN]->(folder:Folder {name: $folder_name}) RETURN f.name"),
+    ("functions of file",
+     r"(?:what|which) functions are (?:declared )?in (?:the )?file ([\w.]+)",
+     [("File", "file_name")],
+     "MATCH (f:Function)-[:DECLARED_AT]->(fi:File {name: $file_name}) RETURN f.name"),
+    ("folders of project",
+     r"(?:what|which) are the folders (?:included )?in (?:the )?(\w+)(?: project)?",
+     [("Project", "project_name")],
+     "MATCH (f:Folder)-[:INCLUDED_IN]->(p:Project {name: $project_name}) RETURN f.name"),
+]
+COMPILED_TEMPLATES = [(name, re.compile(pattern, re.IGNORECASE), entities, query) for name, pattern, entities, query in QUESTION_TEMPLATES]
+_router_lock = threading.Lock()
+router_stats = {"template hits": 0, "llm fallbacks": 0, "templates": {}}
+
+
+def retrieve_context(driver: Driver, user_prompt: str, pipe: str, schema: str) -> tuple[list, str, bool]: 
+    # retrieves the context from the KG, CodeLlama is only asked for the cypher query if no template matches the question
+    # the last value tells if the result was cut off
+    routed = route_question(driver, user_prompt)
+    if routed:
+        cypher_query, params = routed
+        query_result, truncated = run_query(driver, cypher_query, params)
+        return query_result, format_query(cypher_query, params), truncated # the answer prompt shows the query with its values
 
-def retrieve_context(driver: Driver, user_prompt: str, pipe: str, schema: str) -> tuple[str, str]: 
-    # retrieves the context from the KG
     cypher_query = get_cypher_query(user_prompt, pipe, schema)
 
-    query_result = run_query(driver, cypher_query)
+    # CodeLlama often misspells or miscases the names, they are replaced by the names in the graph
+    cypher_query, corrections, unknown = get_entity_index(driver).rewrite_query(cypher_query)
+    if corrections or unknown:
+        print("Corrected names: ", corrections, "Unknown names: ", unknown)
+    cypher_query = cypher_validator.validate(driver, cypher_query) # raises before a write or invalid query reaches the database
+
+    query_result, truncated = run_query(driver, cypher_query)
     
-    return query_result, cypher_query
+    return query_result, cypher_query, truncated
+
+
+def route_question(driver: Driver, user_prompt: str) -> tuple[str, dict]|None:
+    # returns the parameterized query of the first template that matches the question and whose names are in the graph
+    entity_index = get_entity_index(driver)
+    for name, pattern, entities, query in COMPILED_TEMPLATES:
+        match = pattern.search(user_prompt)
+        if not match:
+            continue
+        params = {}
+        # the user may write the name in another case, the graph has the exact one, misspelled or unknown names go to CodeLlama
+        # the parameters come last, they are only looked up among those of the captured function
+        for (label, parameter), value in sorted(zip(entities, match.groups()), key=lambda item: item[0][0] == "Parameter"):
+            params[parameter] = entity_index.lookup_exact(value, label, params.get("function_name") if label == "Parameter" else None)
+        if all(params.values()):
+            with _router_lock:
+                router_stats["template hits"] += 1
+                router_stats["templates"][name] = router_stats["templates"].get(name, 0) + 1
+            return query, params
+    with _router_lock:
+        router_stats["llm fallbacks"] += 1
+    return None
+
+
+def format_query(cypher_query: str, params: dict) -> str:
+    # the query with the parameters replaced by their values
+    return re.sub(r"\$(\w+)", lambda match: json.dumps(params[match.group(1)]), cypher_query)
+
+
+def get_router_stats() -> dict:
+    with _router_lock:
+        questions = router_stats["template hits"] + router_stats["llm fallbacks"]
+        hit_rate = router_stats["template hits"] / questions if questions else 0.0
+        return {**router_stats, "templates": dict(router_stats["templates"]), "hit rate": hit_rate}
 
 def get_cypher_query(user_prompt: str, pipe: TextGenerationPipeline, schema: str) -> str:
     # gets the cypher query
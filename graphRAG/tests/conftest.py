@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules of the graphRAG are imported like the scripts do, e.g. from utils.query_cache import ...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,61 @@
+import itertools
+import pytest
+import utils.answer_cache as answer_cache
+from utils.answer_cache import AnswerCache, get_answer_cache, is_cacheable
+
+RESULT = [["f.name"], ["getAtom"]]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(answer_cache.time, "time", lambda: next(clock))    # distinct last_used values, the eviction order is fixed
+    return AnswerCache(str(tmp_path / "answers.sqlite"), max_entries=2)
+
+
+def get_key(question: str, prompt_version: str = "p1", graph_version: str = "g1") -> str:
+    return AnswerCache.get_key(question, "codellama", "qwen", prompt_version, graph_version)
+
+
+def test_hit_and_miss(cache):
+    key = get_key("What methods does the class Atom have?")
+    assert cache.get(key) is None
+    cache.put(key, "What methods does the class Atom have?", "MATCH (f) RETURN f.name", RESULT, "getAtom")
+    assert cache.get(key) == ("MATCH (f) RETURN f.name", RESULT, "getAtom")
+    assert cache.get(get_key("what methods does the class  atom have")) is not None    # case, whitespace and punctuation are ignored
+    assert cache.get_stats() == {"hits": 2, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_least_recently_used_answer_is_evicted(cache):
+    for question in ["a", "b"]:
+        cache.put(get_key(question), question, "q", RESULT, question)
+    cache.get(get_key("a"))     # b is now the least recently used answer
+    cache.put(get_key("c"), "c", "q", RESULT, "c")
+    assert cache.get(get_key("b")) is None
+    assert cache.get(get_key("a")) is not None and cache.get(get_key("c")) is not None
+    assert cache.get_stats()["evictions"] == 1 and cache.get_stats()["size"] == 2
+
+
+def test_prompt_and_graph_version_are_part_of_the_key(cache):
+    cache.put(get_key("a"), "a", "q", RESULT, "a")
+    assert cache.get(get_key("a", prompt_version="p2")) is None
+    assert cache.get(get_key("a", graph_version="g2")) is None
+    assert get_key("a", graph_version=None) != get_key("a")
+
+
+def test_answers_without_result_rows_are_not_cached():
+    assert is_cacheable("MATCH (f) RETURN f.name", RESULT)
+    assert not is_cacheable("MATCH (f) RETURN f.name", [["f.name"]])    # only the column headers
+    assert not is_cacheable("None", "Context could not be retrieved")
+
+
+def test_cache_is_created_on_first_use(tmp_path, monkeypatch):
+    path = tmp_path / "cache" / "answers.sqlite"
+    monkeypatch.setattr(answer_cache, "_answer_cache", None)
+    monkeypatch.setenv("ANSWER_CACHE_PATH", str(path))
+    assert not path.parent.exists()
+    assert get_answer_cache() is get_answer_cache()
+    assert path.exists()
+    monkeypatch.setattr(answer_cache, "_answer_cache", None)
+    monkeypatch.setenv("ANSWER_CACHE_PATH", "")
+    assert get_answer_cache() is None
@@ -0,0 +1,89 @@
+import pytest
+from neo4j.exceptions import Neo4jError
+from utils.cypher_validator import CypherValidationError, CypherValidator, get_errors, get_query_shape
+
+
+class FakeDriver():
+    # counts the EXPLAIN queries and raises the given error for each of them
+    def __init__(self, error: Exception|None = None) -> None:
+        self.error = error
+        self.queries = []
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def run(self, query: str):
+        self.queries.append(query)
+        if self.error:
+            raise self.error
+        return self
+
+    def consume(self) -> None:
+        pass
+
+
+def test_valid_queries_have_no_errors():
+    assert get_errors("MATCH (c:Class {name: 'Atom'})-[:HAS]->(f:Function) RETURN f.name, f.comment") == []
+    assert get_errors("MATCH (p:Parameter)-[:OF_TYPE]->(c:Class) WHERE c.name = 'Atom' RETURN p.name") == []
+    assert get_errors("MATCH (f:Function)<-[:HAS]-(c:Class) RETURN c.name LIMIT 5") == []
+    assert get_errors("MATCH (c:Class {name: 'CREATE a DELETE'}) RETURN c") == []   # words in literals are ignored
+
+
+@pytest.mark.parametrize("clause, query", [
+    ("CREATE", "CREATE (c:Class {name: 'Atom'}) RETURN c"),
+    ("MERGE", "MERGE (c:Class {name: 'Atom'}) RETURN c"),
+    ("DELETE", "MATCH (c:Class) DELETE c RETURN count(c)"),
+    ("SET", "MATCH (c:Class) SET c.name = 'Atom' RETURN c"),
+    ("CALL", "CALL db.labels() YIELD label RETURN label"),
+])
+def test_write_clauses_are_rejected(clause, query):
+    assert f"Write clause {clause} is not allowed" in get_errors(query)
+
+
+def test_unknown_schema_elements():
+    assert get_errors("MATCH (m:Method) RETURN m.name") == ["Unknown label Method"]
+    assert get_errors("MATCH (c:Class)-[:CONTAINS]->(f:Function) RETURN f.name") == ["Unknown relationship type CONTAINS"]
+    assert get_errors("MATCH (f:Function)-[:HAS]->(c:Class) RETURN f.name") == ["There is no relationship (Function)-[:HAS]->(Class)"]
+    assert get_errors("MATCH (c:Class) RETURN c.type") == ["Class has no property type"]
+    assert get_errors("MATCH (c:Class) WHERE c.name = 'Atom'") == ["The query has no RETURN clause"]
+
+
+def test_validate_raises_and_strips_the_semicolon():
+    validator = CypherValidator()
+    assert validator.validate(None, "MATCH (c:Class) RETURN c.name;") == "MATCH (c:Class) RETURN c.name"
+    with pytest.raises(CypherValidationError, match="Unknown label Method"):
+        validator.validate(None, "MATCH (m:Method) RETURN m.name")
+    assert validator.stats == {"valid": 1, "invalid": 1, "explains": 0}
+
+
+def test_explain_verdict_is_cached_per_shape():
+    driver = FakeDriver()
+    validator = CypherValidator(explain=True)
+    validator.validate(driver, "MATCH (c:Class {name: 'Atom'}) RETURN c.name LIMIT 5")
+    validator.validate(driver, "MATCH (c:Class {name: 'Bond'}) RETURN c.name LIMIT 10")
+    assert get_query_shape("MATCH (c:Class {name: 'Atom'}) RETURN c") == get_query_shape("MATCH (c:Class {name: 'Bond'})  RETURN c;")
+    assert driver.queries == ["EXPLAIN MATCH (c:Class {name: 'Atom'}) RETURN c.name LIMIT 5"]
+    assert validator.stats["explains"] == 1
+
+
+def test_failed_explain_is_cached():
+    driver = FakeDriver(Neo4jError.hydrate(code="Neo.ClientError.Statement.SyntaxError", message="Invalid input"))
+    validator = CypherValidator(explain=True)
+    for name in ["Atom", "Bond"]:
+        with pytest.raises(CypherValidationError, match="The query cannot be planned: Invalid input"):
+            validator.validate(driver, f"MATCH (c:Class {{name: '{name}'}}) RETURN c.name ORDER BY")
+    assert len(driver.queries) == 1
+    assert validator.stats == {"valid": 0, "invalid": 2, "explains": 1}
+
+
+def test_invalid_queries_are_not_explained():
+    driver = FakeDriver()
+    with pytest.raises(CypherValidationError):
+        CypherValidator(explain=True).validate(driver, "MATCH (m:Method) RETURN m")
+    assert driver.queries == []
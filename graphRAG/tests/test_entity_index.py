@@ -0,0 +1,74 @@
+from utils.entity_index import EntityIndex, is_other_entity
+
+NAMES = {
+    "Class": ["Vector3D", "AtomContainer", "Matrix", "AtomBondMapping", "MoleculeReader"],
+    "Function": ["perceiveExtendedType", "getMMFF94TypeIndex", "getAtom", "getBond"],
+    "Parameter": ["atom", "bond", "feature", "index"],
+}
+SCOPES = {"Parameter": {"getAtom": {"index"}, "getBond": {"index", "atom"}, "perceiveExtendedType": {"feature"}}}
+
+
+def get_index() -> EntityIndex:
+    return EntityIndex(NAMES, SCOPES)
+
+
+def test_exact_and_case_insensitive_lookup():
+    index = get_index()
+    assert index.lookup("Vector3D", "Class") == "Vector3D"
+    assert index.lookup("atombondmapping", "Class") == "AtomBondMapping"
+    assert index.lookup_exact("ATOMCONTAINER", "Class") == "AtomContainer"
+    assert index.lookup("Atom", "Folder") is None   # a label without names
+
+
+def test_misspelled_names_are_corrected():
+    index = get_index()
+    assert index.lookup("percieveExtendedType", "Function") == "perceiveExtendedType"
+    assert index.lookup("getMMFF94TypeIdx", "Function") == "getMMFF94TypeIndex"
+    assert index.lookup("MoleculeRaeder", "Class") == "MoleculeReader"
+    assert index.lookup_exact("percieveExtendedType", "Function") is None   # only lookup is fuzzy
+
+
+def test_other_entities_are_not_linked():
+    index = get_index()
+    for name in ["Vector2D", "Container", "Matrix3D", "AtomMapping"]:
+        assert index.lookup(name, "Class") is None
+    assert is_other_entity("Vector2D", "Vector3D") and is_other_entity("Matrix3D", "Matrix")
+    assert is_other_entity("Container", "AtomContainer") and is_other_entity("AtomMapping", "AtomBondMapping")
+    assert not is_other_entity("percieveExtendedType", "perceiveExtendedType")
+
+
+def test_ambiguous_names_are_not_linked():
+    index = EntityIndex({"Function": ["getAtomCount", "getBondCount"]})
+    assert index.lookup("getAomCount", "Function") == "getAtomCount"
+    assert index.lookup("getCount", "Function") is None
+
+
+def test_parameters_are_scoped_to_the_function():
+    index = get_index()
+    assert index.lookup_exact("index", "Parameter", "getAtom") == "index"
+    assert index.lookup_exact("atom", "Parameter", "getAtom") is None   # a parameter of another function
+    assert index.lookup_exact("Atom", "Parameter", "getBond") == "atom"
+    assert index.lookup_exact("atom", "Parameter", "unknownFunction") is None
+    assert index.lookup_exact("atom", "Parameter") == "atom"
+
+
+def test_rewrite_query():
+    index = get_index()
+    query, corrections, unknown = index.rewrite_query(
+        "MATCH (c:Class {name: 'atombondmapping'})-[:HAS]->(f:Function) WHERE f.name = \"percieveExtendedType\" RETURN f.name")
+    assert query == "MATCH (c:Class {name: 'AtomBondMapping'})-[:HAS]->(f:Function) WHERE f.name = \"perceiveExtendedType\" RETURN f.name"
+    assert corrections == [("Class", "atombondmapping", "AtomBondMapping"), ("Function", "percieveExtendedType", "perceiveExtendedType")]
+    assert unknown == []
+
+
+def test_rewrite_query_keeps_other_entities():
+    query = "MATCH (c:Class {name: 'Vector2D'}) RETURN c.comment"
+    assert get_index().rewrite_query(query) == (query, [], [("Class", "Vector2D")])
+
+
+def test_rewrite_query_scopes_parameters():
+    index = get_index()
+    query = "MATCH (f:Function {name: 'getAtom'})-[:HAS]->(p:Parameter {name: 'atom'}) RETURN p.type"
+    assert index.rewrite_query(query) == (query, [], [("Parameter", "atom")])
+    query, corrections, _ = index.rewrite_query("MATCH (f:Function {name: 'getBond'})-[:HAS]->(p:Parameter {name: 'Atom'}) RETURN p.type")
+    assert corrections == [("Parameter", "Atom", "atom")]
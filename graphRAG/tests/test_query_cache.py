@@ -0,0 +1,106 @@
+import pytest
+import utils.query_cache as query_cache
+from utils.query_cache import QueryCache, get_graph_version, normalize_query
+
+
+class FakeResult():
+    def __init__(self, versions: list) -> None:
+        self.versions = versions
+
+    def single(self) -> dict:
+        return {"versions": self.versions}
+
+
+class FakeDriver():
+    # returns the (project name, graph version) pairs of the project nodes
+    def __init__(self, versions: list) -> None:
+        self.versions = versions
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def run(self, query: str) -> FakeResult:
+        return FakeResult(self.versions)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_normalize_query_keeps_literals():
+    assert normalize_query("MATCH (c:Class)\n  RETURN c.name ;") == "MATCH (c:Class) RETURN c.name"
+    assert normalize_query("MATCH (c {name: 'a  b'})  RETURN c;") == "MATCH (c {name: 'a  b'}) RETURN c"
+    cache = QueryCache()
+    assert cache.get_key("MATCH (c)\tRETURN c;", None) == cache.get_key("MATCH (c) RETURN c", {})
+    assert cache.get_key("MATCH (c {name: 'a  b'}) RETURN c", None) != cache.get_key("MATCH (c {name: 'a b'}) RETURN c", None)
+    assert cache.get_key("MATCH (c) RETURN c", {"a": 1}) != cache.get_key("MATCH (c) RETURN c", {"a": 2})
+
+
+def test_least_recently_used_result_is_evicted(clock):
+    cache = QueryCache(max_size=2)
+    cache.put("a", [["a"]])
+    cache.put("b", [["b"]])
+    assert cache.get("a") == ([["a"]], False)    # b is now the least recently used result
+    cache.put("c", [["c"]])
+    assert cache.get("b") is None
+    assert cache.get("a") == ([["a"]], False) and cache.get("c") == ([["c"]], False)
+    assert cache.get_stats()["evictions"] == 1 and cache.get_stats()["size"] == 2
+
+
+def test_results_expire_after_ttl(clock):
+    cache = QueryCache(ttl=10)
+    cache.put("a", [["a"]])
+    clock[0] = 10
+    assert cache.get("a") == ([["a"]], False)
+    clock[0] = 10.5
+    assert cache.get("a") is None
+
+
+def test_cached_result_is_a_copy(clock):
+    cache = QueryCache()
+    cache.put("a", [["a"]])
+    cache.get("a")[0].append(["b"])
+    assert cache.get("a") == ([["a"]], False)
+
+
+def test_graph_version_change_clears_the_cache(clock):
+    driver = FakeDriver([["CDPKit", "v1"]])
+    cache = QueryCache(version_interval=0)
+    cache.check_version(driver)
+    cache.put("a", [["a"]])
+    cache.check_version(driver)     # the same version keeps the results
+    assert cache.get("a") == ([["a"]], False)
+    driver.versions = [["CDPKit", "v2"]]
+    cache.check_version(driver)
+    assert cache.get("a") is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_graph_version_is_only_read_after_the_interval(clock):
+    driver = FakeDriver([["CDPKit", "v1"]])
+    cache = QueryCache(version_interval=10)
+    cache.check_version(driver)
+    cache.put("a", [["a"]])
+    driver.versions = [["CDPKit", "v2"]]
+    clock[0] = 5
+    cache.check_version(driver)
+    assert cache.get("a") == ([["a"]], False)
+    clock[0] = 10
+    cache.check_version(driver)
+    assert cache.get("a") is None
+
+
+def test_graph_version_covers_every_project():
+    assert get_graph_version(FakeDriver([])) is None
+    assert get_graph_version(FakeDriver([["CDPKit", None]])) is None    # a graph that was never stamped
+    first = get_graph_version(FakeDriver([["A", "v1"], ["B", "v1"]]))
+    assert first != get_graph_version(FakeDriver([["A", "v1"], ["B", "v2"]]))
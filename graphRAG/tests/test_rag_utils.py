@@ -0,0 +1,88 @@
+import utils.rag_utils as rag_utils
+from utils.query_cache import QueryCache
+from utils.rag_utils import add_limit, run_query
+
+
+class FakeRecord():
+    def __init__(self, values: list) -> None:
+        self._values = values
+
+    def values(self) -> list:
+        return self._values
+
+
+class FakeResult():
+    def __init__(self, keys: list, rows: list) -> None:
+        self._keys = keys
+        self.rows = rows
+
+    def keys(self) -> list:
+        return self._keys
+
+    def __iter__(self):
+        return (FakeRecord(row) for row in self.rows)
+
+    def single(self) -> dict:
+        return {"versions": []}     # the graph version check of the query cache
+
+
+class FakeDriver():
+    # returns the given rows for every query and keeps the queries that were run
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.queries = []
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def run(self, query, params: dict|None = None) -> FakeResult:
+        self.queries.append(getattr(query, "text", query))
+        return FakeResult(["c.name"], self.rows)
+
+
+def test_limit_is_added_to_queries_without_one():
+    assert add_limit("MATCH (c:Class) RETURN c.name", 11) == "MATCH (c:Class) RETURN c.name LIMIT 11"
+    assert add_limit("MATCH (c:Class) RETURN c.name ;", 11) == "MATCH (c:Class) RETURN c.name LIMIT 11"
+
+
+def test_existing_limit_is_kept():
+    assert add_limit("MATCH (c:Class) RETURN c.name LIMIT 5", 11) == "MATCH (c:Class) RETURN c.name LIMIT 5"
+    assert add_limit("MATCH (c:Class) RETURN c.name limit 5;", 11) == "MATCH (c:Class) RETURN c.name limit 5;"
+    # a LIMIT before the final RETURN does not limit the result
+    query = "MATCH (c:Class) WITH c LIMIT 5 MATCH (c)-[:HAS]->(f:Function) RETURN f.name"
+    assert add_limit(query, 11) == f"{query} LIMIT 11"
+    assert add_limit("MATCH (c:Class {name: 'LIMIT'}) RETURN c.name", 11).endswith(" LIMIT 11")    # words in literals are ignored
+
+
+def test_union_and_queries_without_return_are_left_alone():
+    query = "MATCH (c:Class) RETURN c.name AS name UNION MATCH (f:Function) RETURN f.name AS name"
+    assert add_limit(query, 11) == query
+    assert add_limit("SHOW INDEXES", 11) == "SHOW INDEXES"
+
+
+def test_result_within_the_budget():
+    driver = FakeDriver([["Atom"], ["Bond"]])
+    assert run_query(driver, "MATCH (c:Class) RETURN c.name", use_cache=False, max_rows=2) == ([["c.name"], ["Atom"], ["Bond"]], False)
+    assert driver.queries == ["MATCH (c:Class) RETURN c.name LIMIT 3"]    # one more row than used, to find a cut off result
+
+
+def test_truncated_result():
+    driver = FakeDriver([["Atom"], ["Bond"], ["Feature"]])
+    rows, truncated = run_query(driver, "MATCH (c:Class) RETURN c.name", use_cache=False, max_rows=2)
+    assert rows == [["c.name"], ["Atom"], ["Bond"]] and truncated
+    rows, truncated = run_query(driver, "MATCH (c:Class) RETURN c.name", use_cache=False, max_bytes=len(str(["Atom"])))
+    assert rows == [["c.name"], ["Atom"]] and truncated
+
+
+def test_truncation_is_cached(monkeypatch):
+    monkeypatch.setattr(rag_utils, "query_cache", QueryCache())
+    driver = FakeDriver([["Atom"], ["Bond"], ["Feature"]])
+    first = run_query(driver, "MATCH (c:Class) RETURN c.name", max_rows=2)
+    assert run_query(driver, "MATCH (c:Class) RETURN c.name", max_rows=2) == first == ([["c.name"], ["Atom"], ["Bond"]], True)
+    assert driver.queries.count("MATCH (c:Class) RETURN c.name LIMIT 3") == 1    # the second result comes from the cache
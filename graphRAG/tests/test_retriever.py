@@ -0,0 +1,98 @@
+import pytest
+import retriever
+from retriever import route_question, format_query, get_router_stats, QUESTION_TEMPLATES
+from utils.entity_index import EntityIndex
+
+NAMES = {
+    "Project": ["CDPKit"],
+    "Folder": ["Chem"],
+    "File": ["Atom.doc.py"],
+    "Class": ["Atom", "AtomBondMapping", "Feature", "Vector3D"],
+    "Function": ["perceiveExtendedType", "getAtom"],
+    "Parameter": ["feature", "atom", "index"],
+}
+SCOPES = {"Parameter": {"perceiveExtendedType": {"feature"}, "getAtom": {"index"}}}
+
+
+@pytest.fixture(autouse=True)
+def entity_index(monkeypatch):
+    # the router looks the names up in this index instead of the graph
+    index = EntityIndex(NAMES, SCOPES)
+    monkeypatch.setattr(retriever, "get_entity_index", lambda driver: index)
+    return index
+
+
+def route(question: str) -> tuple[str, dict]|None:
+    return route_question(None, question)
+
+
+# one question per template, with the names that it captures
+TEMPLATE_QUESTIONS = [
+    ("parameter type", "What type is parameter feature of function perceiveExtendedType?",
+     {"parameter_name": "feature", "function_name": "perceiveExtendedType"}),
+    ("parameter default", "Does the parameter feature of the function perceiveExtendedType have a default value?",
+     {"parameter_name": "feature", "function_name": "perceiveExtendedType"}),
+    ("parameter of function", "Explain the parameter index of the method getAtom.", {"parameter_name": "index", "function_name": "getAtom"}),
+    ("functions of parameter", "In which functions does the parameter feature appear?", {"parameter_name": "feature"}),
+    ("method of class", "What does the method getAtom of the class Atom do?", {"function_name": "getAtom", "class_name": "Atom"}),
+    ("methods of class", "What methods does the class AtomBondMapping have?", {"class_name": "AtomBondMapping"}),
+    ("base classes", "Which classes does the class Feature inherit from?", {"class_name": "Feature"}),
+    ("parameter count", "How many parameters does the function getAtom take?", {"function_name": "getAtom"}),
+    ("parameters of function", "What parameters does the method perceiveExtendedType take?", {"function_name": "perceiveExtendedType"}),
+    ("function returns", "What does the function getAtom return?", {"function_name": "getAtom"}),
+    ("class attributes", "What are the attributes of the class Atom?", {"class_name": "Atom"}),
+    ("class usage", "How do I initialize an instance of the class Feature?", {"class_name": "Feature"}),
+    ("class comment", "Tell me about the class Vector3D.", {"class_name": "Vector3D"}),
+    ("files of folder", "Which files are included in the folder Chem?", {"folder_name": "Chem"}),
+    ("functions of file", "Which functions are declared in the file Atom.doc.py?", {"file_name": "Atom.doc.py"}),
+    ("folders of project", "What are the folders in the CDPKit project?", {"project_name": "CDPKit"}),
+]
+TEMPLATE_QUERIES = {name: query for name, _, _, query in QUESTION_TEMPLATES}
+
+
+def test_every_template_has_a_question():
+    assert [name for name, _, _ in TEMPLATE_QUESTIONS] == list(TEMPLATE_QUERIES)
+
+
+@pytest.mark.parametrize("name, question, params", TEMPLATE_QUESTIONS)
+def test_template_hit(name, question, params):
+    hits = get_router_stats()["templates"].get(name, 0)
+    assert route(question) == (TEMPLATE_QUERIES[name], params)
+    assert get_router_stats()["templates"][name] == hits + 1
+
+
+def test_other_questions_go_to_the_llm():
+    fallbacks = get_router_stats()["llm fallbacks"]
+    assert route("How do I read molecules from an SDF file?") is None
+    assert route("What is the difference between a Feature and an Atom?") is None
+    assert get_router_stats()["llm fallbacks"] == fallbacks + 2
+
+
+def test_names_in_another_case():
+    query, params = route("WHAT METHODS DOES THE CLASS atombondmapping HAVE?")
+    assert (query, params) == (TEMPLATE_QUERIES["methods of class"], {"class_name": "AtomBondMapping"})
+    assert route("what type is parameter FEATURE of function PerceiveExtendedType")[1] == {"parameter_name": "feature",
+                                                                                          "function_name": "perceiveExtendedType"}
+
+
+def test_misspelled_names_go_to_the_llm():
+    assert route("What methods does the class AtomBondMaping have?") is None
+    assert route("What does the function percieveExtendedType return?") is None
+
+
+def test_other_entities_go_to_the_llm():
+    # Vector2D is not in the graph, the template must not answer about Vector3D
+    assert route("Tell me about the class Vector2D") is None
+    assert route("What methods does the class Mapping have?") is None
+
+
+def test_parameters_are_scoped_to_the_function():
+    query, params = route("What type is parameter feature of function perceiveExtendedType?")
+    assert params == {"function_name": "perceiveExtendedType", "parameter_name": "feature"}
+    assert route("What type is parameter atom of function getAtom?") is None   # atom is a parameter of another function
+    assert route("What type is parameter atom of function perceiveExtendedType?") is None
+
+
+def test_format_query():
+    query, params = route("What methods does the class Atom have?")
+    assert format_query(query, params) == 'MATCH (c:Class {name: "Atom"})-[:HAS]->(f:Function) RETURN f.name, f.comment'
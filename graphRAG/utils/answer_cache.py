@@ -0,0 +1,98 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# the answers of repeated questions are stored on disk, so the dashboard and the command line do not run both models again
+# an answer is only reused for the same models, prompts and graph version, every other change gives new keys
+
+
+def normalize_question(question: str) -> str:
+    # questions that only differ in case, whitespace or the final punctuation get the same answer
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+class AnswerCache():
+    def __init__(self, path: str, max_entries: int = 1000) -> None:
+        self.path = path    # sqlite database file
+        self.max_entries = max_entries  # the least recently used answers are deleted beyond this number
+        self.lock = threading.Lock()    # the dashboard answers questions in several threads
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY, question TEXT, cypher_query TEXT, context TEXT, answer TEXT, created REAL, last_used REAL
+            )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+
+    @contextmanager
+    def connect(self):
+        # one connection per call, a connection must not be shared between threads, it is committed and closed at the end
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def get_key(question: str, model_cypher: str, model_answer: str, prompt_version: str, graph_version: str|None) -> str:
+        return hashlib.sha256(json.dumps([normalize_question(question), model_cypher, model_answer, prompt_version, graph_version]).encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[str, list|str, str]|None:
+        # returns the cypher query, retrieved context and final answer of a stored question
+        with self.lock, self.connect() as connection:
+            row = connection.execute("SELECT cypher_query, context, answer FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            connection.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.stats["hits"] += 1
+        cypher_query, context, answer = row
+        return cypher_query, json.loads(context), answer
+
+    def put(self, key: str, question: str, cypher_query: str, context: list|str, answer: str) -> None:
+        now = time.time()
+        with self.lock, self.connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (key, question, cypher_query, json.dumps(context, default=str), answer, now, now))
+            evicted = connection.execute("""
+            DELETE FROM answers WHERE key IN (
+                SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """, (self.max_entries,)).rowcount
+            self.stats["evictions"] += evicted
+
+    def get_stats(self) -> dict:
+        with self.lock, self.connect() as connection:
+            size = connection.execute("SELECT count(*) FROM answers").fetchone()[0]
+            return {**self.stats, "size": size}
+
+
+def is_cacheable(cypher_query: str, query_result: list|str) -> bool:
+    # answers without context or with an empty result are not stored, the query may work the next time
+    # the first row of a result holds the column headers
+    return cypher_query != "None" and isinstance(query_result, list) and len(query_result) > 1
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache|None:
+    # the cache of the process, created on the first use, an empty ANSWER_CACHE_PATH turns it off
+    global _answer_cache
+    path = os.getenv("ANSWER_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "graphRAG", "answers.sqlite"))
+    if not path:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache(path, int(os.getenv("ANSWER_CACHE_SIZE", "1000")))
+        return _answer_cache
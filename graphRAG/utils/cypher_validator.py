@@ -0,0 +1,153 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from neo4j import Driver
+from neo4j.exceptions import Neo4jError
+from utils.query_cache import normalize_query, STRING_LITERAL
+
+# checks the generated cypher queries before they run: only reading clauses, and labels, relationships, directions and
+# properties that exist in the KG (the schema of get_kg_schema, with the properties that the knowledgeGraph builds also set)
+NODE_PROPERTIES = {
+    "Project": {"name", "graph_version"},
+    "Folder": {"name"},
+    "File": {"name"},
+    "Class": {"name", "comment", "attributes"},
+    "Function": {"name", "comment", "parameter", "decorators", "returns", "uid"},
+    "Parameter": {"name", "comment", "default", "type", "uid"},
+    "Decorator": {"name"},
+}
+RELATIONSHIPS = {
+    ("Folder", "INCLUDED_IN", "Project"),
+    ("File", "INCLUDED_IN", "Folder"),
+    ("Class", "INHERITS_FROM", "Class"),
+    ("Class", "HAS", "Function"),
+    ("Class", "HAS", "Class"),
+    ("Class", "HAS", "Decorator"),
+    ("Class", "DECLARED_AT", "File"),
+    ("Function", "HAS", "Decorator"),
+    ("Function", "HAS", "Parameter"),
+    ("Function", "DECLARED_AT", "File"),
+    ("Parameter", "OF_TYPE", "Class"),
+}
+RELATIONSHIP_TYPES = {relationship_type for _, relationship_type, _ in RELATIONSHIPS}
+WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV|CALL)\b", re.IGNORECASE)
+COMMENT = re.compile(r"//[^\n]*")
+NODE = re.compile(r"\(\s*(\w*)\s*((?::\s*`?\w+`?\s*)*)(\{[^}]*\})?\s*\)")  # (c:Class {name: 'Atom'})
+RELATIONSHIP = re.compile(r"^\s*(<?)-\s*(?:\[\s*(\w*)\s*(?::\s*([`\w|:\s]+?))?\s*(\*[\d.]*)?\s*\])?\s*-(>?)\s*$")     # <-[r:HAS]- or -->
+PROPERTY = re.compile(r"\b(\w+)\.(`?)(\w+)\2")   # c.name
+MAP_KEY = re.compile(r"(\w+)\s*:")   # the keys of {name: 'Atom'}
+
+
+class CypherValidationError(ValueError):
+    pass
+
+
+def get_query_shape(cypher_query: str) -> str:
+    # the query with every literal replaced, so that the questions about different classes share one EXPLAIN verdict
+    shape = STRING_LITERAL.sub("''", normalize_query(cypher_query))
+    return re.sub(r"\b\d+(?:\.\d+)?\b", "0", shape)
+
+
+def get_errors(cypher_query: str) -> list:
+    # the problems of a query that can be found without the database, an empty list for a valid query
+    text = COMMENT.sub("", STRING_LITERAL.sub("''", cypher_query))    # the literals may contain any word
+    errors = [f"Write clause {match.group(1).upper()} is not allowed" for match in WRITE_CLAUSES.finditer(text)]
+    if not re.search(r"\bRETURN\b", text, re.IGNORECASE):
+        errors.append("The query has no RETURN clause")
+
+    variables = {}  # variable -> label of the node it is bound to
+    nodes = list(NODE.finditer(text))
+    for node in nodes:
+        variable, labels, properties = node.group(1), re.findall(r"\w+", node.group(2)), node.group(3)
+        for label in labels:
+            if label not in NODE_PROPERTIES:
+                errors.append(f"Unknown label {label}")
+            elif variable:
+                variables[variable] = label
+        if properties and labels and labels[0] in NODE_PROPERTIES:
+            for key in MAP_KEY.findall(properties):
+                if key not in NODE_PROPERTIES[labels[0]]:
+                    errors.append(f"{labels[0]} has no property {key}")
+
+    for left, right in zip(nodes, nodes[1:]):
+        # the text between two consecutive nodes of a pattern is a relationship, e.g. -[:HAS]->
+        relationship = RELATIONSHIP.match(text[left.end():right.start()])
+        if relationship:
+            errors += get_relationship_errors(relationship, get_node_label(left, variables), get_node_label(right, variables))
+
+    for variable, _, key in PROPERTY.findall(text):
+        label = variables.get(variable)
+        if label and key not in NODE_PROPERTIES[label]:
+            errors.append(f"{label} has no property {key}")
+    return list(dict.fromkeys(errors))  # without duplicates, in order
+
+
+def get_node_label(node: re.Match, variables: dict) -> str|None:
+    labels = re.findall(r"\w+", node.group(2))
+    return labels[0] if labels else variables.get(node.group(1))
+
+
+def get_relationship_errors(relationship: re.Match, left_label: str|None, right_label: str|None) -> list:
+    # checks the types of a relationship and, if the labels of both nodes are known, its direction
+    incoming, types, outgoing = relationship.group(1), relationship.group(3), relationship.group(5)
+    types = re.findall(r"\w+", types or "")
+    errors = [f"Unknown relationship type {t}" for t in types if t not in RELATIONSHIP_TYPES]
+    if errors or not types or not left_label or not right_label or relationship.group(4):
+        return errors   # variable length paths can pass other nodes in between
+    directions = []
+    if outgoing or not incoming:
+        directions.append((left_label, right_label))
+    if incoming or not outgoing:
+        directions.append((right_label, left_label))
+    for t in types:
+        if not any((source, t, target) in RELATIONSHIPS for source, target in directions):
+            arrow = f"({left_label})<-[:{t}]-({right_label})" if incoming else f"({left_label})-[:{t}]->({right_label})"
+            errors.append(f"There is no relationship {arrow}")
+    return errors
+
+
+class CypherValidator():
+    def __init__(self, explain: bool = False, max_shapes: int = 1024) -> None:
+        self.explain = explain  # if set, the database also plans every new query shape with EXPLAIN, which finds syntax errors
+        self.max_shapes = max_shapes
+        self.verdicts = OrderedDict()   # query shape -> error message of EXPLAIN, None if the query could be planned
+        self.lock = threading.Lock()
+        self.stats = {"valid": 0, "invalid": 0, "explains": 0}
+
+    def validate(self, driver: Driver, cypher_query: str) -> str:
+        # returns the query without a trailing semicolon, raises a CypherValidationError if it cannot succeed
+        cypher_query = cypher_query.strip().rstrip(";")
+        errors = get_errors(cypher_query)
+        if not errors and self.explain:
+            error = self.get_explain_verdict(driver, cypher_query)
+            if error:
+                errors.append(error)
+        with self.lock:
+            self.stats["invalid" if errors else "valid"] += 1
+        if errors:
+            raise CypherValidationError("; ".join(errors))
+        return cypher_query
+
+    def get_explain_verdict(self, driver: Driver, cypher_query: str) -> str|None:
+        shape = get_query_shape(cypher_query)
+        with self.lock:
+            if shape in self.verdicts:
+                self.verdicts.move_to_end(shape)
+                return self.verdicts[shape]
+        try:
+            with driver.session() as session:
+                session.run(f"EXPLAIN {cypher_query}").consume()    # only plans the query, nothing is read
+            verdict = None
+        except Neo4jError as e:
+            verdict = f"The query cannot be planned: {e.message}"
+        with self.lock:
+            self.stats["explains"] += 1
+            self.verdicts[shape] = verdict
+            while len(self.verdicts) > self.max_shapes:
+                self.verdicts.popitem(last=False)
+        return verdict
+
+
+# the validator of the process, CYPHER_EXPLAIN=1 also plans every new query shape on the database
+cypher_validator = CypherValidator(explain=os.getenv("CYPHER_EXPLAIN") == "1")
@@ -0,0 +1,49 @@
+import os
+import atexit
+import threading
+from contextlib import ExitStack
+from neo4j import GraphDatabase, Driver
+
+# one driver for the whole process: it keeps a pool of open connections, so a question does not pay the connection setup
+# and the long-running dashboard does not leak a driver per question
+_driver = None
+_driver_lock = threading.Lock()    # the dashboard answers questions in several threads
+
+
+def get_driver() -> Driver:
+    # returns the driver of the process, it is created on first use and closed when the process exits
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            _driver = GraphDatabase.driver(
+                os.getenv("NEO4j_URI"),
+                auth=(os.getenv("NEO4j_USER"), os.getenv("NEO4j_PASSWORD")),
+                max_connection_pool_size=int(os.getenv("NEO4j_POOL_SIZE", "10")), # connections that are kept open at most
+                liveness_check_timeout=float(os.getenv("NEO4j_LIVENESS_CHECK_TIMEOUT", "60")), # pooled connections idle for longer are checked before they are used, AuraDB closes idle connections
+                connection_acquisition_timeout=30.0 # a question fails instead of waiting forever if all connections are busy
+            )
+    return _driver
+
+
+def warm_up_driver(connections: int = 1) -> Driver:
+    # checks the connection and opens the given number of pooled connections at startup instead of during the first questions
+    driver = get_driver()
+    driver.verify_connectivity()
+    with ExitStack() as stack:
+        # every open transaction holds its own connection, so the pool has to open one for each of them
+        transactions = [stack.enter_context(stack.enter_context(driver.session()).begin_transaction()) for _ in range(connections)]
+        for tx in transactions:
+            tx.run("RETURN 1").consume()
+    return driver
+
+
+def close_driver() -> None:
+    # closes the pooled connections, a later get_driver creates a new driver
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+atexit.register(close_driver)    # the pooled connections are closed cleanly when the process exits
@@ -0,0 +1,161 @@
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from neo4j import Driver
+from utils.query_cache import query_cache
+
+# the names of the nodes of the graph, to find the classes, functions and parameters that a question or a generated query
+# refers to, even if the name is written in another case or slightly misspelled
+ENTITY_LABELS = ["Project", "Folder", "File", "Class", "Function", "Parameter"]
+NODE_NAME = re.compile(r"""\((\w*)\s*:\s*`?(\w+)`?\s*\{\s*name\s*:\s*(['"])(.*?)\3\s*\}""")   # (c:Class {name: 'Atom'})
+NODE_LABEL = re.compile(r"\((\w+)\s*:\s*`?(\w+)`?")     # (c:Class
+PROPERTY_NAME = re.compile(r"""\b(\w+)\.name\s*=\s*(['"])(.*?)\2""")     # c.name = 'Atom'
+NAME_TOKEN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")     # the words and numbers of a camel case name
+
+
+def get_trigrams(name: str) -> set:
+    # the trigrams of the lower case name, padded so that the first and last characters count as well
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def get_tokens(name: str) -> list:
+    # the lower case words and numbers of a camel case name, e.g. Vector2D -> vector, 2, d
+    return [token.lower() for token in NAME_TOKEN.findall(name)]
+
+
+def is_other_entity(name: str, candidate: str) -> bool:
+    # names that differ in their numbers or by whole words are different entities, not misspellings of each other,
+    # e.g. Vector2D and Vector3D, Matrix3D and Matrix, Container and AtomContainer or AtomMapping and AtomBondMapping
+    tokens, candidate_tokens = get_tokens(name), get_tokens(candidate)
+    if [token for token in tokens if token.isdigit()] != [token for token in candidate_tokens if token.isdigit()]:
+        return True
+    shorter, longer = sorted([tokens, candidate_tokens], key=len)
+    remaining = iter(longer)
+    return len(shorter) < len(longer) and all(token in remaining for token in shorter)   # the shorter names are words of the longer one
+
+
+class EntityIndex():
+    def __init__(self, names: dict, scopes: dict|None = None, min_similarity: float = 0.5, min_margin: float = 0.1,
+                 candidates: int = 20, max_posting: int = 500) -> None:
+        self.min_similarity = min_similarity    # trigram similarity (jaccard) that a fuzzy match needs at least
+        self.min_margin = min_margin    # and by how much it has to be more similar than the next name
+        self.candidates = candidates    # names with the most shared trigrams whose similarity is computed
+        self.max_posting = max_posting  # trigrams of more names than this are not counted for the fuzzy lookup
+        self.names = {}     # label -> set of names
+        self.lower_names = {}   # label -> {lower case name: name}
+        self.trigrams = {}  # label -> {trigram: names that contain it}
+        self.scopes = {label: {scope: set(scope_names) for scope, scope_names in label_scopes.items()}
+                       for label, label_scopes in (scopes or {}).items()}   # label -> {e.g. function name: names of its parameters}
+        for label, label_names in names.items():
+            self.names[label] = set(label_names)
+            self.lower_names[label] = {}
+            self.trigrams[label] = {}
+            for name in sorted(self.names[label]):     # sorted, so that names that only differ in case always resolve the same way
+                self.lower_names[label].setdefault(name.lower(), name)
+                for trigram in get_trigrams(name):
+                    self.trigrams[label].setdefault(trigram, []).append(name)
+        self.cached_lookup = lru_cache(maxsize=4096)(self._lookup)    # questions and queries repeat the same names
+
+    def lookup(self, name: str, label: str, scope: str|None = None) -> str|None:
+        # the name of a node with this label: the exact name, the name in another case or a clearly most similar name
+        # with a scope, only the names in the scope are found, e.g. the parameters of one function
+        return self.cached_lookup(name, label, scope, True)
+
+    def lookup_exact(self, name: str, label: str, scope: str|None = None) -> str|None:
+        # like lookup, but without the fuzzy match, an unknown name is not replaced by another entity
+        return self.cached_lookup(name, label, scope, False)
+
+    def _lookup(self, name: str, label: str, scope: str|None, fuzzy: bool) -> str|None:
+        if scope is not None and label in self.scopes:
+            scope_names = self.scopes[label].get(scope, set())
+            if name in scope_names:
+                return name
+            for scope_name in sorted(scope_names):
+                if scope_name.lower() == name.lower():
+                    return scope_name
+            return self.get_best_match(name, scope_names) if fuzzy else None
+        if name in self.names.get(label, ()):
+            return name
+        lower_name = self.lower_names.get(label, {}).get(name.lower())
+        if lower_name:
+            return lower_name
+        return self.get_similar(name, label) if fuzzy else None
+
+    def get_similar(self, name: str, label: str) -> str|None:
+        # counts the shared trigrams over the posting lists and computes the similarity only for the best candidates
+        # the long posting lists of common trigrams like "get" are skipped, unless the name has no other trigrams
+        label_trigrams = self.trigrams.get(label, {})
+        postings = [label_trigrams[trigram] for trigram in get_trigrams(name) if trigram in label_trigrams]
+        rare_postings = [posting for posting in postings if len(posting) <= self.max_posting]
+        shared = Counter()
+        for posting in rare_postings or postings:
+            shared.update(posting)
+        return self.get_best_match(name, [candidate for candidate, _ in shared.most_common(self.candidates)])
+
+    def get_best_match(self, name: str, candidates) -> str|None:
+        # the most similar candidate, if it is similar enough, clearly ahead of the next one and not another entity
+        trigrams = get_trigrams(name)
+        similarities = sorted(((len(trigrams & get_trigrams(candidate)) / len(trigrams | get_trigrams(candidate)), candidate)
+                               for candidate in candidates), key=lambda item: (-item[0], item[1]))
+        if not similarities or similarities[0][0] < self.min_similarity:
+            return None
+        if len(similarities) > 1 and similarities[0][0] - similarities[1][0] < self.min_margin:
+            return None     # ambiguous
+        best_name = similarities[0][1]
+        return None if is_other_entity(name, best_name) else best_name
+
+    def rewrite_query(self, cypher_query: str) -> tuple[str, list, list]:
+        # replaces the name literals of a generated query by the names in the graph
+        # returns the query, the (label, old name, new name) corrections and the (label, name) that were not found at all
+        corrections, unknown = [], []
+        labels = {variable: label for variable, label in NODE_LABEL.findall(cypher_query)}
+        # the parameters are only looked up among those of the function, if the query names exactly one
+        function_names = {match.group(4) for match in NODE_NAME.finditer(cypher_query) if match.group(2) == "Function"}
+        function_names |= {match.group(3) for match in PROPERTY_NAME.finditer(cypher_query) if labels.get(match.group(1)) == "Function"}
+        functions = {self.lookup(name, "Function") for name in function_names} - {None}
+        scopes = {"Parameter": functions.pop()} if len(functions) == 1 else {}
+
+        def replace(label: str, name: str, quote: str, text: str) -> str:
+            if label not in self.names:     # not a label with names, e.g. a misspelled label, which the validator reports
+                return text
+            found = self.lookup(name, label, scopes.get(label))
+            if found is None:
+                unknown.append((label, name))
+                return text
+            if found != name:
+                corrections.append((label, name, found))
+                return text.replace(f"{quote}{name}{quote}", f"{quote}{found}{quote}")
+            return text
+
+        cypher_query = NODE_NAME.sub(lambda match: replace(match.group(2), match.group(4), match.group(3), match.group(0)), cypher_query)
+        cypher_query = PROPERTY_NAME.sub(lambda match: replace(labels.get(match.group(1)), match.group(3), match.group(2), match.group(0)), cypher_query)
+        return cypher_query, corrections, unknown
+
+
+_entity_index = None
+_entity_index_version = None
+_entity_index_lock = threading.Lock()
+
+
+def load_entity_index(driver: Driver) -> EntityIndex:
+    names, parameters = {}, {}
+    with driver.session() as session:
+        for label in ENTITY_LABELS:
+            names[label] = [record["name"] for record in session.run(f"MATCH (n:{label}) RETURN DISTINCT n.name AS name") if record["name"]]
+        # parameter names like atom or index exist in many functions, a question about one function only matches its own
+        query = "MATCH (f:Function)-[:HAS]->(p:Parameter) RETURN f.name AS function_name, collect(DISTINCT p.name) AS parameter_names"
+        for record in session.run(query):
+            parameters.setdefault(record["function_name"], set()).update(record["parameter_names"])
+    return EntityIndex(names, {"Parameter": parameters})
+
+
+def get_entity_index(driver: Driver) -> EntityIndex:
+    # the index of the process, it is loaded again when the graph version changes after a build
+    global _entity_index, _entity_index_version
+    query_cache.check_version(driver)
+    with _entity_index_lock:
+        if _entity_index is None or _entity_index_version != query_cache.graph_version:
+            _entity_index, _entity_index_version = load_entity_index(driver), query_cache.graph_version
+        return _entity_index
@@ -0,0 +1,88 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from neo4j import Driver
+
+# the cypher queries of many questions are the same, so their results are kept for a while instead of querying the KG again
+# the knowledgeGraph builds stamp a new graph_version on the project node, all entries are dropped when it changes
+STRING_LITERAL = re.compile(r"""('(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")""")
+
+
+def normalize_query(query: str) -> str:
+    # collapses the whitespace outside of string literals and removes a trailing semicolon, the literals are kept as they are
+    parts = STRING_LITERAL.split(query.strip())
+    for i in range(0, len(parts), 2):  # every second part is a string literal
+        parts[i] = re.sub(r"\s+", " ", parts[i])
+    return "".join(parts).rstrip("; ")
+
+
+def get_graph_version(driver: Driver) -> str|None:
+    # a digest of the versions that the builds stamped on the project nodes, so the rebuild of any project changes it
+    # (the stamps are random, the largest one may stay the same), None for a graph that was never stamped
+    with driver.session() as session:
+        record = session.run("MATCH (p:Project) WITH p ORDER BY p.name RETURN collect([p.name, p.graph_version]) AS versions").single()
+    versions = [version for version in (record["versions"] if record else []) if version[1] is not None]
+    return hashlib.sha256(json.dumps(versions).encode()).hexdigest() if versions else None
+
+
+class QueryCache():
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0, version_interval: float = 10.0) -> None:
+        self.max_size = max_size    # number of query results that are kept, the least recently used one is evicted first
+        self.ttl = ttl  # seconds after which a result is queried again
+        self.version_interval = version_interval    # the graph version is read at most once in this many seconds
+        self.entries = OrderedDict()    # (query, params, ...) -> (time stored, result, whether the result was cut off)
+        self.lock = threading.Lock()    # the dashboard answers questions in several threads
+        self.graph_version = None
+        self.version_checked = None     # time of the last version check
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get_key(self, query: str, params: dict|None) -> tuple[str, str]:
+        return normalize_query(query), json.dumps(params or {}, sort_keys=True, default=str)
+
+    def check_version(self, driver: Driver) -> None:
+        # drops all entries if the graph was rebuilt since the last check
+        now = time.monotonic()
+        if self.version_checked is not None and now - self.version_checked < self.version_interval:
+            return
+        version = get_graph_version(driver)
+        with self.lock:
+            if self.version_checked is not None and version != self.graph_version:
+                self.entries.clear()
+                self.stats["invalidations"] += 1
+            self.graph_version, self.version_checked = version, now
+
+    def get(self, key: tuple) -> tuple[list, bool]|None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return list(entry[1]), entry[2]  # a copy, so the caller cannot change the cached result
+
+    def put(self, key: tuple, result: list, truncated: bool = False) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic(), list(result), truncated)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "size": len(self.entries), "hit rate": self.stats["hits"] / lookups if lookups else 0.0}
+
+
+# the cache of the process, shared like the driver
+query_cache = QueryCache(int(os.getenv("QUERY_CACHE_SIZE", "256")), float(os.getenv("QUERY_CACHE_TTL", "3600")))
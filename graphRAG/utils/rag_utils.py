@@ -3,10 +3,13 @@ os.environ['HF_HOME'] = os.getenv("MODEL_LOCATION")
 os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "expandable_segments:True"
 
 from huggingface_hub import hf_hub_download
-from neo4j import GraphDatabase, Driver
+from neo4j import Driver, Query
 from transformers import AutoTokenizer, pipeline
 from transformers.pipelines.text_generation import TextGenerationPipeline
 import torch
+import re
+from utils.driver_manager import get_driver
+from utils.query_cache import query_cache, STRING_LITERAL
 
 
 
@@ -34,16 +37,49 @@ def get_pipelines(model_cypher: str, model_answer: str) -> tuple[TextGenerationP
 
 
 def initialize_neo4j() -> Driver:
-    # initializes the neo4j driver necessary to query the KG
-    return GraphDatabase.driver(os.getenv("NEO4j_URI"), auth=(os.getenv("NEO4j_USER"), os.getenv("NEO4j_PASSWORD")))
-
-
-def run_query(driver: Driver, query: str, params: dict|None =None) -> list:
-    with driver.session() as session: # starts new session
-            result = session.run(query, params) # executes the query
-            output = [r.values() for r in result] # turns the query output into a list with only the values of the result dict
-            output.insert(0, result.keys()) # inserts the column headers of the query result at the beginning of the output list 
-            return output
+    # returns the neo4j driver necessary to query the KG, it is shared by the whole process and must not be closed by the caller
+    return get_driver()
+
+
+QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "200")) # rows of a query result that are passed on to the prompt at most
+QUERY_MAX_BYTES = int(os.getenv("QUERY_MAX_BYTES", "100000")) # approximate size of the rows in characters at most
+QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT", "10")) # seconds after which the database stops a query
+
+
+def add_limit(query: str, limit: int) -> str:
+    # appends a LIMIT to a query whose final RETURN has none, so that the database stops after the rows that are used
+    text = STRING_LITERAL.sub("''", query) # the literals may contain any word
+    returns = list(re.finditer(r"\bRETURN\b", text, re.IGNORECASE))
+    if not returns or re.search(r"\bLIMIT\b", text[returns[-1].start():], re.IGNORECASE) or re.search(r"\bUNION\b", text, re.IGNORECASE):
+        return query # the LIMIT of a UNION would only limit its last part
+    return f"{query.strip().rstrip('; ')} LIMIT {limit}"
+
+
+def run_query(driver: Driver, query: str, params: dict|None =None, use_cache: bool = True, max_rows: int = QUERY_MAX_ROWS,
+              max_bytes: int = QUERY_MAX_BYTES, timeout: float = QUERY_TIMEOUT) -> tuple[list, bool]:
+    # returns the rows and whether they were cut off, so that the answer model can be told that rows are missing
+    # the results are cached until their ttl runs out or the graph is rebuilt, see query_cache
+    if use_cache:
+        query_cache.check_version(driver)
+        key = (*query_cache.get_key(query, params), max_rows, max_bytes)
+        cached = query_cache.get(key)
+        if cached is not None:
+            return cached
+    # one more row than used is requested, to know if the result was cut off
+    with driver.session(fetch_size=min(max_rows + 1, 1000)) as session: # starts new session, the records are fetched in batches
+            result = session.run(Query(add_limit(query, max_rows + 1), timeout=timeout), params) # executes the query
+            output = [result.keys()] # the column headers of the query result are at the beginning of the output list 
+            size, truncated = 0, False
+            for record in result: # the records are streamed, a runaway query is stopped once the budget is used up
+                values = record.values() # only the values of the result dict
+                size += len(str(values))
+                if len(output) > max_rows or size > max_bytes:
+                    truncated = True
+                    break
+                output.append(values)
+    if use_cache:
+        query_cache.put(key, output, truncated) # failed queries raise before and are not cached
+    return output, truncated
 
 def get_kg_schema() -> str:
     # provides the schema of the KG, which is the nodes and relationships that exist
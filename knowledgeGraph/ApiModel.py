@@ -0,0 +1,118 @@
+import sys
+import json
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+# compact representation of the parsed API: slotted objects instead of dicts, and the names, types and defaults are interned,
+# so that the thousands of parameters named self or of type int share one string
+NO_DEFAULT = sys.intern("No default")
+
+
+def intern_value(value):
+    # names are strings, but types and defaults can also be calls like {"callable": ..., "arguments": [...]}
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@lru_cache(maxsize=65536)
+def _string_to_json(value: str) -> str:
+    return json.dumps(value)
+
+
+def to_json(value) -> str:
+    # the same type names are serialized for many parameters, so the strings are only serialized once
+    return _string_to_json(value) if isinstance(value, str) else json.dumps(value)
+
+
+class ApiInfo():
+    __slots__ = ()
+
+    def __reduce__(self):
+        # pickled by the constructor arguments, so that the strings are interned again after loading from a worker or the parse cache
+        return (type(self), tuple(getattr(self, f.name) for f in fields(self)))
+
+
+@dataclass(slots=True)
+class ParameterInfo(ApiInfo):
+    name: str
+    type: str|dict
+    default: str|dict
+    comment: str
+    uid: str = ""
+
+    def __post_init__(self) -> None:
+        self.name, self.type, self.default = sys.intern(self.name), intern_value(self.type), intern_value(self.default)
+        self.comment = sys.intern(self.comment)     # mostly repeated comments like the one of self
+
+    def to_dict(self, include_uid: bool = True) -> dict:
+        parameter = {"name": self.name, "type": self.type, "default": self.default, "comment": self.comment}
+        if include_uid:
+            parameter["uid"] = self.uid
+        return parameter
+
+
+@dataclass(slots=True)
+class FunctionInfo(ApiInfo):
+    name: str
+    params: list
+    decorators: list
+    return_type: str|dict
+    return_comment: str
+    comment: str
+    uid: str = ""
+
+    def __post_init__(self) -> None:
+        self.name, self.return_type = sys.intern(self.name), intern_value(self.return_type)
+        self.decorators = [intern_value(d) for d in self.decorators]
+
+    def get_parameter_json(self) -> str:
+        # the parameters without their uids, which are stored on the parameter nodes
+        return json.dumps([p.to_dict(include_uid=False) for p in self.params])
+
+    def get_returns_json(self) -> str:
+        return json.dumps({"type": self.return_type, "comment": self.return_comment})
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "params": [p.to_dict() for p in self.params], "decorators": self.decorators,
+                "return_type": {"type": self.return_type, "comment": self.return_comment}, "comment": self.comment, "uid": self.uid}
+
+
+@dataclass(slots=True)
+class AttributeInfo(ApiInfo):
+    name: str
+    value: str|dict
+    comment: str
+
+    def __post_init__(self) -> None:
+        self.name, self.value = sys.intern(self.name), intern_value(self.value)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "value": self.value, "comment": self.comment}
+
+
+@dataclass(slots=True)
+class ClassInfo(ApiInfo):
+    name: str
+    bases: list
+    decorators: list
+    methods: list
+    class_attributes: list
+    nested_classes: list
+    comment: str
+
+    def __post_init__(self) -> None:
+        self.name = sys.intern(self.name)
+        self.bases = [intern_value(b) for b in self.bases]
+        self.decorators = [intern_value(d) for d in self.decorators]
+
+    def get_attributes_json(self) -> str:
+        return json.dumps([a.to_dict() for a in self.class_attributes])
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "bases": self.bases, "decorators": self.decorators, "methods": [m.to_dict() for m in self.methods],
+                "class_attributes": [a.to_dict() for a in self.class_attributes],
+                "nested_classes": [nc.to_dict() for nc in self.nested_classes], "comment": self.comment}
+
+
+def file_info_to_dict(file_info: dict) -> dict:
+    # the parsed file in the plain dict form of the earlier parser versions
+    return {"classes": [c.to_dict() for c in file_info["classes"]], "functions": [f.to_dict() for f in file_info["functions"]]}
@@ -0,0 +1,54 @@
+import asyncio
+from neo4j import AsyncDriver
+from BatchWriter import BatchWriter
+from RowCollector import RowCollector
+from SymbolTable import SymbolTable
+
+
+class AsyncIngestor():
+    # writes independent partitions of the info dict concurrently over several sessions of the async driver
+    # a partition is a chunk of files of one folder, its nodes and relationships are written in one transaction with the
+    # nodes first, so every relationship finds its nodes (e.g. the File of a DECLARED_AT) and partitions need no order among each other
+    def __init__(self, driver: AsyncDriver, info_dict: dict, project_name: str, batch_size: int = 1000,
+                 concurrency: int = 4, partition_files: int = 50) -> None:
+        self.driver = driver
+        self.info_dict = info_dict  # dict from DocParser
+        self.project_name = project_name
+        self.batch_size = batch_size
+        self.concurrency = concurrency  # maximum number of partitions that are written at the same time
+        self.partition_files = partition_files  # files per partition, large folders are split into several partitions
+        self.symbol_table = SymbolTable(info_dict)  # bases and types resolve against all partitions
+
+    def get_partitions(self) -> list:
+        # the info dicts of the partitions, each with the files of one folder only
+        partitions = []
+        for folder, files_info in self.info_dict.items():
+            file_names = list(files_info)
+            for start in range(0, max(len(file_names), 1), self.partition_files):
+                partitions.append({folder: {file_name: files_info[file_name] for file_name in file_names[start:start + self.partition_files]}})
+        return partitions
+
+    async def ingest(self) -> dict:
+        # the project node is written first, as every partition connects its folder to it
+        project_batch = BatchWriter(self.batch_size)
+        project_batch.add_node("Project", {"name": self.project_name})
+        await self._write(project_batch)
+        stats = {"partitions": 0, "files": 0, "rows": project_batch.row_count, "queries": project_batch.query_count}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def write_partition(partition: dict) -> None:
+            async with semaphore:
+                batch = RowCollector(partition, self.project_name, self.batch_size, self.symbol_table).collect_rows()
+                await self._write(batch)
+            stats["partitions"] += 1    # the tasks run in one thread, so the stats need no lock
+            stats["files"] += sum(len(files_info) for files_info in partition.values())
+            stats["rows"] += batch.row_count
+            stats["queries"] += batch.query_count
+
+        await asyncio.gather(*(write_partition(partition) for partition in self.get_partitions()))
+        return stats
+
+    async def _write(self, batch: BatchWriter) -> None:
+        # concurrent MERGEs of shared nodes (e.g. the base classes) can deadlock, the driver then retries the transaction
+        async with self.driver.session() as session:
+            await session.execute_write(batch.write_async)
@@ -0,0 +1,101 @@
+from neo4j import Transaction, AsyncManagedTransaction
+
+
+class BatchWriter():
+    # collects node and relationship rows per label and relationship type and writes them as a few UNWIND statements
+    def __init__(self, batch_size: int = 1000) -> None:
+        self.batch_size = batch_size    # maximum number of rows that are sent with one statement
+        self.nodes = {}     # (label, key properties, set properties) -> {key values: row}
+        self.relationships = {}     # (source label, source keys, relationship type, target label, target keys) -> {(source values, target values): row}
+        self.query_count = 0    # number of statements sent by write()
+
+    def add_node(self, label: str, key: dict, properties: dict|None = None) -> None:
+        # adds a node that is merged on its key properties, the other properties are set afterwards
+        properties = properties or {}
+        rows = self.nodes.setdefault((label, tuple(key), tuple(properties)), {})
+        rows[tuple(key.values())] = {**key, **properties}   # the same key is only sent once, the last properties win like consecutive SETs do
+
+    def add_relationship(self, source_label: str, source_key: dict, relationship_type: str,
+                         target_label: str, target_key: dict) -> None:
+        # adds a relationship between two nodes that are matched on their key properties
+        rows = self.relationships.setdefault((source_label, tuple(source_key), relationship_type, target_label, tuple(target_key)), {})
+        rows[(tuple(source_key.values()), tuple(target_key.values()))] = {"source": source_key, "target": target_key}
+
+    @property
+    def row_count(self) -> int:
+        return sum(len(rows) for rows in self.nodes.values()) + sum(len(rows) for rows in self.relationships.values())
+
+    def get_stats(self) -> dict:
+        return {"rows": self.row_count, "queries": self.query_count}
+
+    def write(self, tx: Transaction) -> None:
+        # nodes are written before the relationships, so every MATCH finds its nodes
+        self.query_count = 0    # the transaction function can be retried by the driver
+        for (label, keys, properties), rows in self.nodes.items():
+            self._run_batched(tx, self._node_query(label, keys, properties), list(rows.values()))
+        for (source_label, source_keys, relationship_type, target_label, target_keys), rows in self.relationships.items():
+            query = self._relationship_query(source_label, source_keys, relationship_type, target_label, target_keys)
+            self._run_batched(tx, query, list(rows.values()))
+
+    async def write_async(self, tx: AsyncManagedTransaction) -> None:
+        # the same statements as write() for the transaction functions of an async session
+        self.query_count = 0
+        for (label, keys, properties), rows in self.nodes.items():
+            await self._run_batched_async(tx, self._node_query(label, keys, properties), list(rows.values()))
+        for (source_label, source_keys, relationship_type, target_label, target_keys), rows in self.relationships.items():
+            query = self._relationship_query(source_label, source_keys, relationship_type, target_label, target_keys)
+            await self._run_batched_async(tx, query, list(rows.values()))
+
+    async def _run_batched_async(self, tx: AsyncManagedTransaction, query: str, rows: list) -> None:
+        for start in range(0, len(rows), self.batch_size):
+            result = await tx.run(query, rows=rows[start:start + self.batch_size])
+            await result.consume()
+            self.query_count += 1
+
+    def _run_batched(self, tx: Transaction, query: str, rows: list) -> None:
+        # sends the rows in chunks of batch_size
+        for start in range(0, len(rows), self.batch_size):
+            tx.run(query, rows=rows[start:start + self.batch_size])
+            self.query_count += 1
+
+    @staticmethod
+    def _node_query(label: str, keys: tuple, properties: tuple) -> str:
+        # creates the nodes (if they do not already exist) and sets their properties
+        key_map = ", ".join(f"`{k}`: row.`{k}`" for k in keys)
+        query = f"""
+        UNWIND $rows AS row
+        MERGE (n:{label} {{{key_map}}})
+        """
+        if properties:
+            query += "SET " + ", ".join(f"n.`{p}` = row.`{p}`" for p in properties)
+        return query
+
+    @staticmethod
+    def _relationship_query(source_label: str, source_keys: tuple, relationship_type: str,
+                            target_label: str, target_keys: tuple) -> str:
+        # creates the relationships between already existing nodes (if they do not already exist)
+        source_map = ", ".join(f"`{k}`: row.source.`{k}`" for k in source_keys)
+        target_map = ", ".join(f"`{k}`: row.target.`{k}`" for k in target_keys)
+        return f"""
+        UNWIND $rows AS row
+        MATCH (fo:{source_label} {{{source_map}}}), (fi:{target_label} {{{target_map}}})
+        MERGE (fo)-[:{relationship_type}]->(fi)
+        """
+
+
+class CountingTransaction():
+    # wraps the transaction of the per-row mode and counts its statements, each of which sends one row
+    def __init__(self, tx: Transaction) -> None:
+        self.tx = tx
+        self.query_count = 0
+
+    def run(self, query: str, parameters: dict|None = None, **kwargs):
+        self.query_count += 1
+        return self.tx.run(query, parameters, **kwargs)
+
+    @staticmethod
+    def count(tx: Transaction, function, *args) -> dict:
+        # runs a transaction function with the counting transaction and returns the stats
+        counting_tx = CountingTransaction(tx)
+        function(counting_tx, *args)
+        return {"rows": counting_tx.query_count, "queries": counting_tx.query_count}
@@ -0,0 +1,76 @@
+import os
+import csv
+from BatchWriter import BatchWriter
+from RowCollector import RowCollector
+from SchemaManager import SchemaManager
+
+
+class BulkExporter():
+    # writes the graph that KnowledgeGraphManager.create_graph would create as csv files for the neo4j-admin bulk importer
+    def __init__(self, info_dict: dict, project_name: str) -> None:
+        self.info_dict = info_dict  # dict from DocParser
+        self.project_name = project_name
+
+    def collect_rows(self) -> BatchWriter:
+        # collects the rows with the same managers that write them to the database in batched mode
+        return RowCollector(self.info_dict, self.project_name).collect_rows()
+
+    def get_graph(self) -> tuple[dict, dict]:
+        # dedupes the rows like the MERGE calls do and returns {label: {id: properties}} and {(source label, type, target label): {(source id, target id)}}
+        batch = self.collect_rows()
+        nodes = {}
+        for (label, keys, _), rows in batch.nodes.items():
+            for row in rows.values():
+                properties = nodes.setdefault(label, {}).setdefault(row[keys[0]], {})
+                properties.update(row)   # later SETs overwrite earlier ones
+        relationships = {}
+        skipped = 0
+        for (source_label, source_keys, relationship_type, target_label, target_keys), rows in batch.relationships.items():
+            for row in rows.values():
+                source_id, target_id = row["source"][source_keys[0]], row["target"][target_keys[0]]
+                if source_id not in nodes.get(source_label, {}) or target_id not in nodes.get(target_label, {}):
+                    skipped += 1    # the MATCH of the managers would not find the node either
+                    continue
+                relationships.setdefault((source_label, relationship_type, target_label), set()).add((source_id, target_id))
+        if skipped:
+            print(f"Relationships without both nodes that were skipped: {skipped}")
+        return nodes, relationships
+
+    def export(self, output_dir: str) -> tuple[list, list]:
+        # writes one csv file per label and property set and one per relationship type and node labels, returns the file paths
+        os.makedirs(output_dir, exist_ok=True)
+        nodes, relationships = self.get_graph()
+        node_files = []
+        for label, label_nodes in nodes.items():
+            # nodes with different property sets go to different files, so no file has to express missing properties
+            groups = {}
+            for properties in label_nodes.values():
+                groups.setdefault(tuple(sorted(properties)), []).append(properties)
+            id_key = SchemaManager.UNIQUE_KEYS[label]   # the unique key of the label is the id of the node
+            for i, (property_names, rows) in enumerate(groups.items()):
+                file_path = os.path.join(output_dir, f"nodes_{label}_{i}.csv")
+                other_names = [name for name in property_names if name != id_key]
+                header = [f"{id_key}:ID({label})"] + other_names + [":LABEL"]
+                self._write_csv(file_path, header, [[row[id_key]] + [row[name] for name in other_names] + [label] for row in rows])
+                node_files.append(file_path)
+
+        relationship_files = []
+        for (source_label, relationship_type, target_label), pairs in relationships.items():
+            file_path = os.path.join(output_dir, f"relationships_{relationship_type}_{source_label}_{target_label}.csv")
+            header = [f":START_ID({source_label})", f":END_ID({target_label})", ":TYPE"]
+            self._write_csv(file_path, header, [[source_id, target_id, relationship_type] for source_id, target_id in sorted(pairs)])
+            relationship_files.append(file_path)
+        return node_files, relationship_files
+
+    @staticmethod
+    def _write_csv(file_path: str, header: list, rows: list) -> None:
+        with open(file_path, "w", newline="") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)   # quoted, so that empty comments are imported as empty strings
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    @staticmethod
+    def get_import_command(node_files: list, relationship_files: list, database: str = "neo4j") -> str:
+        # command that creates the database from the exported files, the database must not exist or is overwritten
+        arguments = [f"--nodes={file_path}" for file_path in node_files] + [f"--relationships={file_path}" for file_path in relationship_files]
+        return " ".join(["neo4j-admin database import full", "--multiline-fields=true", "--overwrite-destination=true"] + arguments + [database])
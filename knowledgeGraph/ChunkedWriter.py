@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import hashlib
+from dataclasses import asdict
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from BatchWriter import BatchWriter
+from RowCollector import RowCollector
+from SymbolTable import SymbolTable
+from GraphBackend import GraphBackend
+from DocParser import PARSER_VERSION
+
+
+class ChunkedWriter():
+    # writes the files of the info dict in chunks of a few files or rows per transaction instead of one transaction per stage
+    # a failed chunk is retried on its own and the committed chunks are recorded in a checkpoint file, so an interrupted build resumes
+    # every chunk writes the nodes of its files before their relationships, so the chunks do not depend on each other
+    def __init__(self, backend: GraphBackend, info_dict: dict, project_name: str, batch_size: int = 1000, chunk_files: int = 50,
+                 chunk_rows: int = 50000, checkpoint_path: str|None = None, retries: int = 3) -> None:
+        self.backend = backend
+        self.info_dict = info_dict  # dict from DocParser
+        self.project_name = project_name
+        self.batch_size = batch_size    # rows per statement
+        self.chunk_files = chunk_files  # maximum number of files per transaction
+        self.chunk_rows = chunk_rows    # a chunk is also committed once it has this many rows
+        self.checkpoint_path = checkpoint_path  # if set, the number of committed chunks is stored there
+        self.retries = retries  # attempts per chunk after the first one
+        self.symbol_table = SymbolTable(info_dict)  # bases and types resolve against all files, not only those of the chunk
+
+    def iter_chunks(self):
+        # yields the batches of the chunks, the chunks only depend on the info dict and the limits, so a resumed build gets the same ones
+        batch, file_count = BatchWriter(self.batch_size), 0
+        for folder, files_info in self.info_dict.items():
+            for file_name, file_info in files_info.items():
+                RowCollector({folder: {file_name: file_info}}, self.project_name, symbol_table=self.symbol_table).collect_rows(batch)
+                file_count += 1
+                if file_count == self.chunk_files or batch.row_count >= self.chunk_rows:
+                    yield batch
+                    batch, file_count = BatchWriter(self.batch_size), 0
+        if file_count:
+            yield batch
+
+    def get_fingerprint(self) -> str:
+        # identifies the files, their parsed content, the parser version and the limits of a build, a checkpoint of another build
+        # or of files that changed since the interrupted run is ignored, otherwise the skipped chunks would leave stale data
+        files = [[folder, file_name, self.get_file_hash(file_info)] for folder, files_info in self.info_dict.items()
+                 for file_name, file_info in files_info.items()]
+        return hashlib.sha256(json.dumps([self.project_name, PARSER_VERSION, files, self.chunk_files, self.chunk_rows]).encode()).hexdigest()
+
+    @staticmethod
+    def get_file_hash(file_info: dict) -> str:
+        return hashlib.sha256(json.dumps(file_info, default=asdict, sort_keys=True).encode()).hexdigest()
+
+    def load_checkpoint(self, fingerprint: str) -> int:
+        # the number of chunks that were committed by an earlier run of the same build
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+        return checkpoint["committed_chunks"] if checkpoint.get("fingerprint") == fingerprint else 0
+
+    def save_checkpoint(self, fingerprint: str, committed_chunks: int) -> None:
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": fingerprint, "committed_chunks": committed_chunks}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def write(self) -> dict:
+        fingerprint = self.get_fingerprint()
+        committed_chunks = self.load_checkpoint(fingerprint)
+        if committed_chunks:
+            print(f"Resuming after {committed_chunks} committed chunks")
+        stats = {"chunks": 0, "skipped chunks": 0, "retries": 0, "rows": 0, "queries": 0}
+        for i, batch in enumerate(self.iter_chunks()):
+            if i < committed_chunks:
+                stats["skipped chunks"] += 1
+                continue
+            chunk_stats = self._write_chunk(batch, stats)
+            stats["chunks"] += 1
+            stats["rows"] += chunk_stats["rows"]
+            stats["queries"] += chunk_stats["queries"]
+            if self.checkpoint_path:
+                # a crash before this line only repeats the chunk, which is harmless as every statement is a MERGE
+                self.save_checkpoint(fingerprint, i + 1)
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)     # the build is complete, the next one starts from the beginning
+        return stats
+
+    def _write_chunk(self, batch: BatchWriter, stats: dict) -> dict:
+        # the driver already retries transient errors within a transaction function, this also covers lost connections
+        for attempt in range(self.retries + 1):
+            try:
+                return self.backend.write(batch)
+            except (ServiceUnavailable, SessionExpired, TransientError) as e:
+                if attempt == self.retries:
+                    raise
+                stats["retries"] += 1
+                print(f"Chunk failed ({e}), retrying")
+                time.sleep(2 ** attempt)
@@ -1,15 +1,35 @@
 import ast
+import bisect
+import hashlib
+import json
+from ApiModel import ParameterInfo, FunctionInfo, AttributeInfo, ClassInfo, NO_DEFAULT
 
 
 # Visitor class that will collect class and function information from the AST
 class ClassAndFunctionVisitor(ast.NodeVisitor):
-    def __init__(self, comments: list) -> None:
+    def __init__(self, comments: list, module: str = "") -> None:
         self.classes = []
         self.functions = []
-        self.comments = comments
-        self.class_stack = [] # stack to keep track of nested classes
+        self.comments = sorted(comments)  # (line, comment) tuples
+        self.comment_lines = [line for line, _ in self.comments]  # line index to find the comments above a node with a binary search
+        self.module = module    # qualifies the owners of the functions, e.g. Chem/Atom.doc.py
+        self.signature_counts = {}  # counts identical signatures of the same owner, so that they still get distinct uids
         super().__init__() # inherits the base functionalities of ast.NodeVisitor
 
+    @staticmethod
+    def get_uid(*parts) -> str:
+        # compact, deterministic identity key that is hashed from the given parts
+        return hashlib.blake2b(json.dumps(parts).encode(), digest_size=8).hexdigest()
+
+    def get_function_uid(self, owner: str, function_info: FunctionInfo) -> str:
+        # hashes the qualified owner, the name and the signature of a function
+        signature = ([(p.name, p.type, p.default) for p in function_info.params], 
+                     function_info.return_type, function_info.decorators)
+        key = self.get_uid(owner, function_info.name, signature)
+        occurrence = self.signature_counts.get(key, 0)   # overloads that are documented twice with the same signature
+        self.signature_counts[key] = occurrence + 1
+        return self.get_uid(owner, function_info.name, signature, occurrence)
+
     def get_name(self, node) -> str: 
         # parses the name of the node depending on the node type
         if isinstance(node, ast.Name): 
@@ -27,60 +47,66 @@ class ClassAndFunctionVisitor(ast.NodeVisitor):
     def parse_parameters(self, node, comments: list) -> list: 
         # parses the input parameters of a function
         default_values = [self.get_name(d) for d in node.args.defaults]
-        params_with_defaults = ["No default"] * (len(node.args.args) - len(default_values)) + default_values    # add default values
+        params_with_defaults = [NO_DEFAULT] * (len(node.args.args) - len(default_values)) + default_values    # add default values
         params = []
         for i, arg in enumerate(node.args.args):
-            param_info = {
-                "name": arg.arg,
-                "type": self.get_name(arg.annotation),
-                "default": params_with_defaults[i], 
-                "comment": comments.get(arg.arg, "")    # if there is no comment, an empty string is added 
-            }
+            param_info = ParameterInfo(
+                name=arg.arg,
+                type=self.get_name(arg.annotation),
+                default=params_with_defaults[i], 
+                comment=comments.get(arg.arg, "")    # if there is no comment, an empty string is added 
+            )
             params.append(param_info)
         return params
 
 
-    def parse_function(self, node) -> dict:
+    def parse_function(self, node, owner: str) -> FunctionInfo:
         parsed_comments = self.parse_comments(node.lineno)
         return_type = self.get_name(node.returns)
         params = self.parse_parameters(node, parsed_comments["param"])
-        return {
-            'name': node.name,
-            'params': params,
-            "decorators": [self.get_name(d) for d in node.decorator_list],
-            "return_type": {"type": return_type, "comment": parsed_comments.get("return", "")},
-            "comment": parsed_comments.get("brief", "")
-        }
+        function_info = FunctionInfo(
+            name=node.name,
+            params=params,
+            decorators=[self.get_name(d) for d in node.decorator_list],
+            return_type=return_type,
+            return_comment=parsed_comments.get("return", ""),
+            comment=parsed_comments.get("brief", "")
+        )
+        function_info.uid = self.get_function_uid(owner, function_info)
+        for position, p in enumerate(params):
+            p.uid = self.get_uid(function_info.uid, position, p.name)
+        return function_info
     
-    def parse_attribute(self, node) -> dict:
+    def parse_attribute(self, node) -> AttributeInfo:
         parsed_comments = self.parse_comments(node.lineno)
-        return {
-            "name": node.targets[0].id,
-            "value": self.get_name(node.value),
-            "comment": parsed_comments.get("brief", "")
-        }
+        return AttributeInfo(
+            name=node.targets[0].id,
+            value=self.get_name(node.value),
+            comment=parsed_comments.get("brief", "")
+        )
     
-    def traverse_body(self, info: dict, node): 
+    def traverse_body(self, info: ClassInfo, node, owner: str): 
         # traverses the body of a node and parses the child nodes
         for elem in node.body:
             if isinstance(elem, ast.FunctionDef):
-                info['methods'].append(self.parse_function(elem))
+                info.methods.append(self.parse_function(elem, owner))
             elif isinstance(elem, ast.Assign):
-                info['class_attributes'].append(self.parse_attribute(elem))
+                info.class_attributes.append(self.parse_attribute(elem))
             elif isinstance(elem, ast.ClassDef):
-                nested_class_info = self.parse_class(elem)
-                info['nested_classes'].append(nested_class_info)
+                nested_class_info = self.parse_class(elem, owner)
+                info.nested_classes.append(nested_class_info)
 
     def get_associated_comments(self, lineno: int) -> list: 
         # gets the comments that belong to a specific node within the AST
         associated_comments = []
-        for line, comment in reversed(self.comments):   # start from the bottom
-            if line < lineno:   # look at the comments directly above the class/function etc.
-                if comment.startswith("##"): # marks the end of the comment belonging to this node
-                    break
-                if comment == "#": 
-                    continue
-                associated_comments.append(comment.strip("#").strip())  # remove the unnecessary whitespace and #
+        end = bisect.bisect_left(self.comment_lines, lineno)   # index of the first comment that is not above the node
+        for i in range(end - 1, -1, -1):   # start from the bottom and look at the comments directly above the class/function etc.
+            comment = self.comments[i][1]
+            if comment.startswith("##"): # marks the end of the comment belonging to this node
+                break
+            if comment == "#": 
+                continue
+            associated_comments.append(comment.strip("#").strip())  # remove the unnecessary whitespace and #
         associated_comments.reverse()   # need to reverse as we started from the bottom 
         return associated_comments
 
@@ -121,31 +147,26 @@ class ClassAndFunctionVisitor(ast.NodeVisitor):
         return parsed_comments
             
     
-    def parse_class(self, node) -> dict: 
+    def parse_class(self, node, owner: str) -> ClassInfo: 
         parsed_comments = self.parse_comments(node.lineno)  # get associated comments
-        class_info = {
-            'name': node.name,
-            "bases": [self.get_name(b) for b in node.bases],    # base it inherits from
-            "decorators": [self.get_name(d) for d in node.decorator_list],
-            'methods': [],
-            "class_attributes": [],
-            "nested_classes": [], 
-            "comment": parsed_comments.get("brief", "")
-        }
-        self.traverse_body(class_info, node)
+        class_info = ClassInfo(
+            name=node.name,
+            bases=[self.get_name(b) for b in node.bases],    # base it inherits from
+            decorators=[self.get_name(d) for d in node.decorator_list],
+            methods=[],
+            class_attributes=[],
+            nested_classes=[], 
+            comment=parsed_comments.get("brief", "")
+        )
+        self.traverse_body(class_info, node, f"{owner}::{node.name}")   # the class is the owner of its methods and nested classes
         return class_info
 
     def visit_ClassDef(self, node) -> None: 
         # needed to overwrite the default function from ast
-        self.class_stack.append(node.name)  # handles nested classes
-        class_info = self.parse_class(node)
-        if len(self.class_stack) == 1:  
-            self.classes.append(class_info)
-        self.generic_visit(node)
-        self.class_stack.pop()
+        # parse_class already traverses the methods, attributes and nested classes, so the body is not visited again
+        self.classes.append(self.parse_class(node, self.module))
     
     def visit_FunctionDef(self, node) -> None:
         # needed to overwrite the default function from ast
-        if not self.class_stack: 
-            self.functions.append(self.parse_function(node))
+        self.functions.append(self.parse_function(node, self.module))
         self.generic_visit(node)
@@ -1,26 +1,69 @@
 from neo4j import Driver, Transaction
 from FunctionManager import FunctionManager
 from DecoratorManager import DecoratorManager
-import json
+from BatchWriter import BatchWriter
+from GraphBackend import GraphBackend, as_backend
+from ApiModel import ClassInfo
+from SymbolTable import SymbolTable
 
 class ClassManager(): 
-    def __init__(self, driver: Driver|None = None, info_dict: dict|None = None):
-        self.driver = driver 
+    def __init__(self, driver: Driver|GraphBackend|None = None, info_dict: dict|None = None, batch_size: int|None = None,
+                 symbol_table: SymbolTable|None = None):
+        self.backend = as_backend(driver, batch_size)   # a neo4j driver is wrapped in a Neo4jBackend
         self.info_dict = info_dict
-        self.FunctionManager = FunctionManager()
+        self.batch_size = batch_size    # if set, the rows are written in batches instead of one query per node and edge
+        self.symbol_table = symbol_table or SymbolTable(info_dict)  # resolves the bases, shared with the FunctionManager for the parameter types
+        self.FunctionManager = FunctionManager(symbol_table=self.symbol_table)
         self.DecoratorManager = DecoratorManager()
 
-    def create_classes(self) -> None: 
-        with self.driver.session() as session:
-            session.execute_write(self._create_classes)
+    def create_classes(self) -> dict: 
+        if self.batch_size:
+            batch = BatchWriter(self.batch_size)
+            self._collect_classes(batch)
+            return self.backend.write(batch)
+        return self.backend.write_rows(self._create_classes)
+
+    def _collect_classes(self, batch: BatchWriter) -> None:
+        # collects all the classes in all files with their nodes and edges
+        for nested_dict in self.info_dict.values():
+            for file_name, class_and_function_dicts in nested_dict.items():
+                for c in class_and_function_dicts["classes"]: 
+                    self._collect_class(batch, file_name, c)
+
+    def _collect_class(self, batch: BatchWriter, file_name: str, c: ClassInfo) -> None:
+        # takes a parsed class and collects all nodes and relationships related to that class
+        class_key = {"name": c.name}
+        batch.add_node("Class", class_key, {"comment": c.comment})
+        batch.add_relationship("Class", class_key, "DECLARED_AT", "File", {"name": file_name})
+
+        for base in c.bases: 
+            base_name = self.symbol_table.resolve(base, "Class", class_key, "INHERITS_FROM")
+            if base_name:
+                batch.add_node("Class", {"name": base_name})    # declared, but maybe in a file of another chunk
+                batch.add_relationship("Class", class_key, "INHERITS_FROM", "Class", {"name": base_name})
+
+        for d in c.decorators:
+            self.DecoratorManager._collect_decorator(batch, d, "Class", class_key)
+
+        for m in c.methods:
+            # a method is treated the same way as a normal function definition, but it has a relationship to the class node
+            self.FunctionManager._collect_function(batch, m)
+            batch.add_relationship("Class", class_key, "HAS", "Function", {"uid": m.uid})
+
+        if c.class_attributes: 
+            batch.add_node("Class", class_key, {"attributes": c.get_attributes_json()})
+
+        for nc in c.nested_classes:
+            self._collect_class(batch, file_name, nc)
+            batch.add_relationship("Class", class_key, "HAS", "Class", {"name": nc.name})
 
     def _create_classes(self, tx: Transaction) -> None:
         for nested_dict in self.info_dict.values():
             for file_name, class_and_function_dicts in nested_dict.items():
                 # loops through all the classes in all files and creates their nodes and edges
                 for c in class_and_function_dicts["classes"]: 
-                    ClassManager._create_class_node(tx, c["name"])
-                    self._set_class_comment(tx, c["name"], c["comment"])    # this is necessary if the class already exists but without a comment
+                    ClassManager._create_class_node(tx, c.name)
+                    self._set_class_comment(tx, c.name, c.comment)    # this is necessary if the class already exists but without a comment
                     self._create_class_relationships(tx, file_name, c)
                 
     @staticmethod
@@ -74,37 +117,33 @@ class ClassManager():
         """
         tx.run(query, class_name=class_name, nested_class_name=nested_class_name)
 
-    def _create_class_relationships(self, tx: Transaction, file_name: str, c: dict) -> None:
-        # takes a class dict and creates all relationships and nodes related to that class
-        class_name = c["name"]
+    def _create_class_relationships(self, tx: Transaction, file_name: str, c: ClassInfo) -> None:
+        # takes a parsed class and creates all relationships and nodes related to that class
+        class_name = c.name
         self._create_class_file_relationship(tx, file_name, class_name)
 
-        for base in c["bases"]: 
-            base_name = base
-            if "." in base: 
-                modules = base.split(".")
-                base_name = modules[-1]
-            ClassManager._create_class_node(tx, class_name=base_name)   # this is why comments and attributes can be also set later if a class node was already created through inheritance
-            self._create_class_inheritance_relationship(tx, class_name=class_name, base_name=base_name) 
+        for base in c.bases: 
+            base_name = self.symbol_table.resolve(base, "Class", {"name": class_name}, "INHERITS_FROM")
+            if base_name:
+                ClassManager._create_class_node(tx, class_name=base_name)   # this is why comments and attributes can be also set later if a class node was already created through inheritance
+                self._create_class_inheritance_relationship(tx, class_name=class_name, base_name=base_name) 
 
-        for d in c["decorators"]:
+        for d in c.decorators:
             self.DecoratorManager._create_decorator_node(tx, decorator_name=d)
             self.DecoratorManager._create_decorator_class_relationship(tx, class_name=class_name, decorator_name=d)
 
-        for m in c["methods"]:
+        for m in c.methods:
             # a method is treated the same way as a normal function definition, but it has a relationship to the class node
-            method_name = m["name"]
-            method_comment = m["comment"]
-            parameters = json.dumps(self.FunctionManager.ParameterManager._parse_parameters(m["params"]))
-            self.FunctionManager._create_function_node(tx, method_name, method_comment, parameters, json.dumps(m["decorators"]), return_type=json.dumps(m["return_type"]))
-            self.FunctionManager._create_function_class_relationship(tx, method_name, method_comment, class_name, parameters, json.dumps(m["decorators"]), return_type=json.dumps(m["return_type"]))
+            properties = self.FunctionManager._get_function_properties(m)
+            self.FunctionManager._create_function_node(tx, m.uid, properties["name"], properties["comment"], properties["parameter"], properties["decorators"], properties["returns"])
+            self.FunctionManager._create_function_class_relationship(tx, m.uid, class_name)
             self.FunctionManager._create_function_inputs(tx, m)
 
-        if c["class_attributes"]: 
-            self._set_class_attributes(tx, class_name, json.dumps(c["class_attributes"]))
+        if c.class_attributes: 
+            self._set_class_attributes(tx, class_name, c.get_attributes_json())
 
-        for nc in c["nested_classes"]:
-            ClassManager._create_class_node(tx, class_name=nc["name"])
-            self._set_class_comment(tx, nc["name"], nc["comment"])
+        for nc in c.nested_classes:
+            ClassManager._create_class_node(tx, class_name=nc.name)
+            self._set_class_comment(tx, nc.name, nc.comment)
             self._create_class_relationships(tx, file_name=file_name, c=nc)
-            self._create_nested_class_relationship(tx, class_name=class_name, nested_class_name=nc["name"])
\ No newline at end of file
+            self._create_nested_class_relationship(tx, class_name=class_name, nested_class_name=nc.name)
\ No newline at end of file
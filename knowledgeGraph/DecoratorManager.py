@@ -1,4 +1,5 @@
 from neo4j import Transaction
+from BatchWriter import BatchWriter
 
 
 class DecoratorManager(): 
@@ -18,13 +19,15 @@ class DecoratorManager():
             """
         tx.run(query, class_name=class_name, decorator_name=decorator_name)
 
-    def _create_decorator_function_relationship(self, tx: Transaction, decorator_name: str, function_name: str, function_comment: str, 
-                                                parameter_dict: str, decorator_list: str, return_type: str) -> None:
+    def _create_decorator_function_relationship(self, tx: Transaction, decorator_name: str, function_uid: str) -> None:
         # creates the relationship between a function and its decorator (if it does not already exist)
         query = """
-        MATCH (fo:Function {name: $function_name, comment: $function_comment, parameter: $parameter_dict, decorators: $decorator_list, returns: $return_type}), (fi:Decorator {name: $decorator_name})
+        MATCH (fo:Function {uid: $function_uid}), (fi:Decorator {name: $decorator_name})
         MERGE (fo)-[:HAS]->(fi)
         """
-        tx.run(query, decorator_name=decorator_name, function_name=function_name, function_comment=function_comment, parameter_dict=parameter_dict, decorator_list=decorator_list, return_type=return_type)
+        tx.run(query, decorator_name=decorator_name, function_uid=function_uid)
 
-   
\ No newline at end of file
+    def _collect_decorator(self, batch: BatchWriter, decorator_name: str, owner_label: str, owner_key: dict) -> None:
+        # collects the decorator node and its edge from the decorated class or function
+        batch.add_node("Decorator", {"name": decorator_name})
+        batch.add_relationship(owner_label, owner_key, "HAS", "Decorator", {"name": decorator_name})
@@ -0,0 +1,185 @@
+from neo4j import Driver, Transaction
+from BatchWriter import BatchWriter
+from BulkExporter import BulkExporter
+from SchemaManager import SchemaManager
+from ProjectManager import ProjectManager
+
+
+class DeltaApplier():
+    # compares the graph that create_graph would write with the graph in the database and only writes the difference
+    # only the subgraph of the project is compared: its folders, their files, the classes and functions declared at these files
+    # and everything they have (methods, nested classes, parameters, decorators)
+    PROJECT_SCOPE = """
+    MATCH (p:Project {name: $project_name})
+    OPTIONAL MATCH (p)<-[:INCLUDED_IN]-(folder:Folder)
+    OPTIONAL MATCH (folder)<-[:INCLUDED_IN]-(file:File)
+    OPTIONAL MATCH (file)<-[:DECLARED_AT]-(declared)
+    OPTIONAL MATCH (declared)-[:HAS*]->(member)
+    WITH p, collect(DISTINCT folder) + collect(DISTINCT file) + collect(DISTINCT declared) + collect(DISTINCT member) AS members
+    UNWIND [p] + members AS n
+    WITH DISTINCT n
+    """
+
+    def __init__(self, driver: Driver, info_dict: dict, project_name: str, batch_size: int = 1000) -> None:
+        self.driver = driver
+        self.info_dict = info_dict  # dict from DocParser
+        self.project_name = project_name
+        self.batch_size = batch_size    # rows per statement of the delta
+
+    def get_desired_graph(self) -> tuple[dict, dict]:
+        # {label: {id: properties}} and {(source label, type, target label): {(source id, target id)}}
+        return BulkExporter(self.info_dict, self.project_name).get_graph()
+
+    def get_current_graph(self) -> tuple[dict, dict]:
+        # the nodes and relationships of the database in the same format, read in one transaction
+        with self.driver.session() as session:
+            return session.execute_read(self._read_graph, self.project_name)
+
+    def apply(self, dry_run: bool = False) -> dict:
+        # computes the delta and writes it in one transaction, an unchanged graph is only read
+        delta = self.diff(self.get_desired_graph(), self.get_current_graph())
+        stats = self.get_delta_stats(delta)
+        if dry_run:
+            self.print_delta(delta)
+            return stats
+        if any(stats.values()):
+            SchemaManager(self.driver).create_schema()   # the MATCH of every delta row needs the key indexes
+            with self.driver.session() as session:
+                stats["queries"] = session.execute_write(self._write_delta, delta, self.batch_size)
+        else:
+            stats["queries"] = 0
+        return stats
+
+    @staticmethod
+    def diff(desired: tuple[dict, dict], current: tuple[dict, dict]) -> dict:
+        desired_nodes, desired_relationships = desired
+        current_nodes, current_relationships = current
+        delta = {"added nodes": {}, "changed nodes": {}, "removed nodes": {}, "added relationships": {}, "removed relationships": {}}
+        for label in desired_nodes.keys() | current_nodes.keys():
+            desired_label_nodes, current_label_nodes = desired_nodes.get(label, {}), current_nodes.get(label, {})
+            for node_id, properties in desired_label_nodes.items():
+                if node_id not in current_label_nodes:
+                    delta["added nodes"].setdefault(label, {})[node_id] = properties
+                    continue
+                current_properties = current_label_nodes[node_id]
+                set_properties = {k: v for k, v in properties.items() if current_properties.get(k) != v}
+                removed_properties = tuple(sorted(k for k in current_properties if k not in properties))
+                if set_properties or removed_properties:
+                    delta["changed nodes"].setdefault(label, {})[node_id] = (set_properties, removed_properties)
+            removed_ids = current_label_nodes.keys() - desired_label_nodes.keys()
+            if removed_ids:
+                delta["removed nodes"][label] = sorted(removed_ids)
+
+        removed_nodes = {(label, node_id) for label, node_ids in delta["removed nodes"].items() for node_id in node_ids}
+        for key in desired_relationships.keys() | current_relationships.keys():
+            source_label, _, target_label = key
+            added = desired_relationships.get(key, set()) - current_relationships.get(key, set())
+            removed = {(source_id, target_id) for source_id, target_id in current_relationships.get(key, set()) - desired_relationships.get(key, set())
+                       if (source_label, source_id) not in removed_nodes and (target_label, target_id) not in removed_nodes}   # deleted with their nodes
+            if added:
+                delta["added relationships"][key] = added
+            if removed:
+                delta["removed relationships"][key] = removed
+        return delta
+
+    @staticmethod
+    def get_delta_stats(delta: dict) -> dict:
+        return {name: sum(len(items) for items in groups.values()) for name, groups in delta.items()}
+
+    @staticmethod
+    def print_delta(delta: dict, examples: int = 5) -> None:
+        # prints the size of every part of the delta per label or relationship type and a few of its ids
+        for name, groups in delta.items():
+            for group, items in groups.items():
+                group_name = "-".join(group) if isinstance(group, tuple) else group
+                print(f"{name} {group_name}: {len(items)} {sorted(items)[:examples]}")
+
+    @staticmethod
+    def _key_expression(variable: str) -> str:
+        # the unique key of a node, which depends on its label
+        cases = " ".join(f"WHEN '{label}' THEN {variable}.`{key}`" for label, key in SchemaManager.UNIQUE_KEYS.items())
+        return f"CASE head(labels({variable})) {cases} END"
+
+    @staticmethod
+    def _read_graph(tx: Transaction, project_name: str) -> tuple[dict, dict]:
+        # only reads the subgraph of the project, the nodes of other projects in the same database are never part of the delta
+        nodes, scope = {}, set()
+        query = DeltaApplier.PROJECT_SCOPE + """
+        RETURN elementId(n) AS element_id, head(labels(n)) AS label, properties(n) AS properties
+        """
+        for record in tx.run(query, project_name=project_name):
+            label, properties = record["label"], record["properties"]
+            if label not in SchemaManager.UNIQUE_KEYS:
+                continue
+            # the graph version is not part of the parsed graph, it is stamped again after the delta
+            nodes.setdefault(label, {})[properties[SchemaManager.UNIQUE_KEYS[label]]] = {k: v for k, v in properties.items()
+                                                                                       if k != ProjectManager.VERSION_PROPERTY}
+            scope.add(record["element_id"])
+        query = DeltaApplier.PROJECT_SCOPE + f"""
+        MATCH (n)-[r]->(b)
+        WHERE head(labels(b)) IN $labels
+        RETURN elementId(b) AS target_element_id, head(labels(n)) AS source_label, {DeltaApplier._key_expression("n")} AS source_id,
+               type(r) AS type, head(labels(b)) AS target_label, {DeltaApplier._key_expression("b")} AS target_id
+        """
+        relationships = {}
+        for record in tx.run(query, project_name=project_name, labels=list(SchemaManager.UNIQUE_KEYS)):
+            if record["target_element_id"] not in scope or record["source_label"] not in SchemaManager.UNIQUE_KEYS:
+                continue    # a relationship into another project, e.g. of a folder that both projects include
+            key = (record["source_label"], record["type"], record["target_label"])
+            relationships.setdefault(key, set()).add((record["source_id"], record["target_id"]))
+        return nodes, relationships
+
+    @staticmethod
+    def _write_delta(tx: Transaction, delta: dict, batch_size: int) -> int:
+        # removes first, so that the following MERGEs cannot match anything that is about to be removed, returns the number of statements
+        query_count = 0
+
+        def run_batched(query: str, rows: list) -> None:
+            nonlocal query_count
+            for start in range(0, len(rows), batch_size):
+                tx.run(query, rows=rows[start:start + batch_size])
+                query_count += 1
+
+        keys = SchemaManager.UNIQUE_KEYS
+        for (source_label, relationship_type, target_label), pairs in delta["removed relationships"].items():
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (:{source_label} {{`{keys[source_label]}`: row.source}})-[r:{relationship_type}]->(:{target_label} {{`{keys[target_label]}`: row.target}})
+            DELETE r
+            """
+            run_batched(query, [{"source": source_id, "target": target_id} for source_id, target_id in sorted(pairs)])
+        for label, node_ids in delta["removed nodes"].items():
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (n:{label} {{`{keys[label]}`: row}})
+            DETACH DELETE n
+            """
+            run_batched(query, node_ids)
+        removed_properties = {}
+        for label, changes in delta["changed nodes"].items():
+            for node_id, (_, property_names) in changes.items():
+                if property_names:
+                    removed_properties.setdefault((label, property_names), []).append(node_id)
+        for (label, property_names), node_ids in removed_properties.items():
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (n:{label} {{`{keys[label]}`: row}})
+            REMOVE {", ".join(f"n.`{name}`" for name in property_names)}
+            """
+            run_batched(query, node_ids)
+
+        # the added and changed nodes and the added relationships are merged like in the batched mode
+        batch = BatchWriter(batch_size)
+        for label, label_nodes in delta["added nodes"].items():
+            for node_id, properties in label_nodes.items():
+                batch.add_node(label, {keys[label]: node_id}, {k: v for k, v in properties.items() if k != keys[label]})
+        for label, changes in delta["changed nodes"].items():
+            for node_id, (set_properties, _) in changes.items():
+                if set_properties:
+                    batch.add_node(label, {keys[label]: node_id}, set_properties)
+        for (source_label, relationship_type, target_label), pairs in delta["added relationships"].items():
+            for source_id, target_id in pairs:
+                batch.add_relationship(source_label, {keys[source_label]: source_id}, relationship_type,
+                                       target_label, {keys[target_label]: target_id})
+        batch.write(tx)
+        return query_count + batch.query_count
@@ -3,49 +3,115 @@ import glob
 import ast
 import re
 import tokenize
+import textwrap
 from io import StringIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
 from ClassAndFunctionVisitor import ClassAndFunctionVisitor
+from ParseCache import ParseCache
+
+PARSER_VERSION = 3  # has to be increased whenever the parsed output changes, so that cached results are not reused
+MAX_REPAIRS = 50    # statements with syntax errors that are repaired per file, before the file is given up
 
 class DocParser(): 
 
-    def __init__(self, dir_path: str, all_files_info: dict = {}) -> None:
+    def __init__(self, dir_path: str, all_files_info: dict = {}, workers: int = 1, cache_dir: str|None = None) -> None:
         self.dir_path = dir_path    # path to directory that should be parsed
         self.all_files_info = all_files_info    # dict with parsed information
+        self.workers = workers  # number of processes that parse the files, 1 parses them in this process
+        self.cache = ParseCache(cache_dir, PARSER_VERSION) if cache_dir else None  # on-disk results of unchanged files
 
     def parse_dir(self) -> dict:
         # parses files within the dir_path into the all_files_info_dict
-        file_pattern = os.path.join(self.dir_path, '*.doc.py')  # only parse .doc.py files
-        file_list = glob.glob(file_pattern)
+        file_list = self.get_file_list(self.dir_path)
         folder = self.extract_cdpl_substring(self.dir_path)
         self.all_files_info[folder] = {}    # the folder names are the keys
         self.parse_files(file_list, folder)
         return self.all_files_info
+
+    def parse_dirs(self, dir_paths: list) -> dict:
+        # parses several directories into the all_files_info dict, the files of all directories share one pool of workers
+        for dir_path in dir_paths:
+            self.all_files_info[self.extract_cdpl_substring(dir_path)] = {}
+        self.parse_jobs(self.get_jobs(dir_paths))
+        return self.all_files_info
+
+    def get_jobs(self, dir_paths: list) -> list:
+        # the (file path, folder) pairs of all files in the directories
+        return [(file_path, self.extract_cdpl_substring(dir_path)) for dir_path in dir_paths for file_path in self.get_file_list(dir_path)]
+
+    def get_file_list(self, dir_path: str) -> list:
+        # only parse .doc.py files, sorted so that the output order does not depend on the file system
+        file_pattern = os.path.join(dir_path, '*.doc.py')
+        return sorted(glob.glob(file_pattern))
     
     def parse_files(self, file_list: list, folder: str) -> None:
         # parse classes and functions from files
+        self.parse_jobs([(file_path, folder) for file_path in file_list])
+
+    def parse_jobs(self, jobs: list) -> None:
+        # parses the (file path, folder) jobs, in parallel if there is more than one worker, and stores them in the order of the jobs
         unreadable_files = 0    # Some files contain syntax errors 
-        for file_path in file_list: # Loop through each file in the list
-            with open(file_path, 'r') as f: # Open and read the text file
-                content = f.read()
-                comments = self.extract_comments(content)
-            try: 
-                tree = ast.parse(content) # get an AST tree from the content of the doc.py file
-            except SyntaxError as e:
-                try:
-                    content = self.clean_unreadable_text(content)   # there are syntax errors in the documentation
-                    tree = ast.parse(content)
-                except SyntaxError as e: 
-                    print(f'Syntax error in file {file_path}: {e}') 
-                    unreadable_files = unreadable_files + 1
-                    continue 
-
-            visitor = ClassAndFunctionVisitor(comments) # Create an instance of the ClassAndFunctionVisitor and visit the AST
-            visitor.visit(tree)
+        for file_path, folder, file_info in self.iter_jobs(jobs):
+            if file_info is None:
+                unreadable_files = unreadable_files + 1
+                continue
             file_name = self.extract_doc_py_filename(file_path) # get the name of the file
-            self.all_files_info[folder][file_name] = {"classes": visitor.classes, "functions": visitor.functions }
+            self.all_files_info.setdefault(folder, {})[file_name] = file_info
         print(f"Amount of files that could not be parsed: {unreadable_files}")
 
-    
+    def iter_jobs(self, jobs: list):
+        # yields (file path, folder, parsed info) in the order of the jobs, the info is None if the file could not be parsed
+        # only a few files per worker are parsed ahead, so the results do not pile up when the consumer is slower
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 and len(jobs) > 1 else None
+        pending = deque()
+        try:
+            for file_path, folder in jobs:
+                pending.append((file_path, folder, *self._start_job(executor, file_path, folder)))
+                if len(pending) >= self.workers * 4:
+                    yield self._finish_job(*pending.popleft())
+            while pending:
+                yield self._finish_job(*pending.popleft())
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    def _start_job(self, executor: ProcessPoolExecutor|None, file_path: str, folder: str) -> tuple[Future, bool]:
+        # returns a future of the parsed info and if it came from the cache
+        future = Future()
+        if self.cache:
+            found, file_info = self.cache.load(file_path, folder)
+            if found:
+                future.set_result(file_info)
+                return future, True
+        if executor:
+            return executor.submit(parse_file, file_path, folder), False
+        future.set_result(self.parse_file(file_path, folder))
+        return future, False
+
+    def _finish_job(self, file_path: str, folder: str, future: Future, cached: bool) -> tuple[str, str, dict|None]:
+        file_info = future.result()
+        if self.cache and not cached:
+            self.cache.store(file_path, folder, file_info)   # files that could not be parsed are stored as well and not retried
+        return file_path, folder, file_info
+
+    def parse_file(self, file_path: str, folder: str) -> dict|None:
+        # parses the classes and functions of one file, returns None if the file could not be parsed
+        with open(file_path, 'r') as f: # Open and read the text file
+            content = f.read()
+            comments = self.extract_comments(content)
+        try: 
+            tree = ast.parse(content) # get an AST tree from the content of the doc.py file
+        except SyntaxError:
+            tree = self.repair_syntax(content, file_path)   # there are syntax errors in the documentation
+            if tree is None:
+                return None
+
+        file_name = self.extract_doc_py_filename(file_path) # get the name of the file
+        visitor = ClassAndFunctionVisitor(comments, module=f"{folder}/{file_name}") # Create an instance of the ClassAndFunctionVisitor and visit the AST
+        visitor.visit(tree)
+        return {"classes": visitor.classes, "functions": visitor.functions }
+
     def extract_comments(self, text: str) -> list:
         # Identifies the comments in the text and returns them
         comments = []
@@ -55,6 +121,86 @@ class DocParser():
                 comments.append((start[0], tok_string.strip()))
         return comments
 
+    def repair_syntax(self, text: str, file_path: str = "") -> ast.Module|None:
+        # repairs only the statements with syntax errors and returns the AST, or None if the file could not be repaired
+        # every repair keeps the number of lines, so that the comments still belong to the same lines
+        lines = text.splitlines(keepends=True)
+        self.repair_headers(lines)  # most errors are in signatures, so one pass over them usually leaves a single reparse
+        levels = {}     # first line of a statement -> repairs that were already tried for it
+        for _ in range(MAX_REPAIRS):
+            try:
+                return ast.parse("".join(lines))
+            except SyntaxError as e:
+                error = e
+                if not e.lineno or e.lineno > len(lines):
+                    break
+                start, end = self.get_statement_range(lines, e.lineno - 1)
+                level = self.repair_statement(lines, start, end, levels.get(start, 0))
+                if level is None:
+                    break
+                levels[start] = level
+        print(f'Syntax error in file {file_path}: {error}')
+        return None
+
+    def repair_headers(self, lines: list) -> None:
+        # checks every single-line def and class statement on its own and repairs the invalid ones
+        for i, line in enumerate(lines):
+            if line.lstrip().startswith(("def ", "class ")) and line.count("(") == line.count(")") and not self.is_valid_statement(line):
+                self.repair_statement(lines, i, i + 1, 0, max_level=2)  # removing a header would break its body
+
+    def repair_statement(self, lines: list, start: int, end: int, level: int, max_level: int = 3) -> int|None:
+        # tries the repairs from the given level on: the regexes, a signature without parameters and finally removing the statement
+        # returns the level to continue with if the same statement fails again, or None if there is no repair left
+        statement = "".join(lines[start:end])
+        repairs = [self.clean_unreadable_text, self.neutralize_statement, self.remove_statement]
+        for i in range(level, max_level):
+            repaired = repairs[i](statement)
+            if repaired != statement and (i == len(repairs) - 1 or self.is_valid_statement(repaired)):
+                repaired_lines = repaired.splitlines(keepends=True)
+                lines[start:end] = repaired_lines + ["\n"] * (end - start - len(repaired_lines))
+                return i + 1
+        return None
+
+    def get_statement_range(self, lines: list, index: int) -> tuple[int, int]:
+        # the lines of the statement at index, a statement continues while it has unclosed parentheses
+        # (but never into the next comment, def or class, so that an unclosed parenthesis cannot swallow them)
+        start, balance = index, 0
+        for k in range(index - 1, max(index - 20, -1), -1):
+            balance += lines[k].count("(") - lines[k].count(")")
+            if balance > 0:     # index is a continuation line of the statement that starts at k
+                start = k
+                break
+        end, balance = start + 1, lines[start].count("(") - lines[start].count(")")
+        while balance > 0 and end < len(lines) and end - start < 20 and not lines[end].lstrip().startswith(("#", "@", "def ", "class ")):
+            balance += lines[end].count("(") - lines[end].count(")")
+            end += 1
+        return start, max(end, index + 1)
+
+    def is_valid_statement(self, statement: str) -> bool:
+        # parses a statement on its own, a block header gets a body
+        text = textwrap.dedent(statement).rstrip()
+        if text.endswith(":"):
+            text += " pass"
+        try:
+            ast.parse(text)
+        except SyntaxError:
+            return False
+        return True
+
+    def neutralize_statement(self, statement: str) -> str:
+        # keeps the name of a function or class whose signature cannot be repaired, a function then has no parameters
+        match = re.match(r'(\s*)(?:async\s+)?(def|class)\s+(\w+)', statement)
+        if not match:
+            return statement
+        indent, keyword, name = match.groups()
+        body = "" if statement.rstrip().endswith(":") else " pass"  # keeps a body that is on the same line
+        signature = f"def {name}(*args, **kwargs):" if keyword == "def" else f"class {name}:"
+        return f"{indent}{signature}{body}\n"
+
+    def remove_statement(self, statement: str) -> str:
+        indent = re.match(r'[ \t]*', statement).group(0)
+        return f"{indent}pass\n"
+
     def clean_unreadable_text(self, text: str) -> str:
         # trys out all the encountered syntax errors and attempts to solve them
         text = self.replace_naming_clash(text)
@@ -94,6 +240,11 @@ class DocParser():
         return re.sub(r"\(\s*([^)]*?mime_type)('[^=)]*?')([^)]*?)\)", replacer, text)
 
 
+def parse_file(file_path: str, folder: str) -> dict|None:
+    # entry point for the worker processes, which only need the parsing functions and not the parsed information
+    return DocParser(os.path.dirname(file_path), {}).parse_file(file_path, folder)
+
+
 if __name__ == "__main__":
     chem_folder_path = "/data/shared/projects/graphRAG/CDPKit/Doc/Doxygen/Python-API/Source/CDPL/Chem"
     pharm_folder_path = "/data/shared/projects/graphRAG/CDPKit/Doc/Doxygen/Python-API/Source/CDPL/Pharm"
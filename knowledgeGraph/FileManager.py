@@ -1,13 +1,26 @@
 from neo4j import Driver, Transaction
+from BatchWriter import BatchWriter
+from GraphBackend import GraphBackend, as_backend
 
 class FileManager():
-    def __init__(self, driver: Driver, info_dict: dict) -> None:
-        self.driver = driver 
+    def __init__(self, driver: Driver|GraphBackend, info_dict: dict, batch_size: int|None = None) -> None:
+        self.backend = as_backend(driver, batch_size)   # a neo4j driver is wrapped in a Neo4jBackend
         self.info_dict = info_dict
+        self.batch_size = batch_size    # if set, the rows are written in batches instead of one query per node and edge
 
-    def create_files(self) -> None: 
-        with self.driver.session() as session:
-            session.execute_write(self._create_file_nodes_and_relationships)
+    def create_files(self) -> dict: 
+        if self.batch_size:
+            batch = BatchWriter(self.batch_size)
+            self._collect_files(batch)
+            return self.backend.write(batch)
+        return self.backend.write_rows(self._create_file_nodes_and_relationships)
+
+    def _collect_files(self, batch: BatchWriter) -> None:
+        # collects the file nodes and their edges to the folders
+        for folder, nested_dict in self.info_dict.items():
+            for file_name in nested_dict.keys():
+                batch.add_node("File", {"name": file_name})
+                batch.add_relationship("File", {"name": file_name}, "INCLUDED_IN", "Folder", {"name": folder})
 
     def _create_file_nodes_and_relationships(self, tx: Transaction) -> None:
          for folder, nested_dict in self.info_dict.items(): # loops through all the files in a folder and creates their nodes and relationships
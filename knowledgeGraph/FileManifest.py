@@ -0,0 +1,38 @@
+import os
+import json
+import hashlib
+
+class FileManifest():
+    # keeps the content hashes of the files that were ingested into the graph
+    def __init__(self, manifest_path: str) -> None:
+        self.manifest_path = manifest_path  # path to the json file that stores the hashes
+        self.hashes = self.load()   # file path -> content hash of the last ingestion
+
+    def load(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}   # nothing was ingested yet, so every file counts as added
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def save(self, hashes: dict) -> None:
+        # writes to a temporary file first, so an interrupted run does not leave a broken manifest
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(hashes, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self.hashes = hashes
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        with open(file_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def compute_hashes(self, file_paths: list) -> dict:
+        return {file_path: self.hash_file(file_path) for file_path in file_paths}
+
+    def diff(self, hashes: dict) -> tuple[list, list, list]:
+        # compares the current hashes with the manifest and returns the added, changed and removed file paths
+        added = sorted(path for path in hashes if path not in self.hashes)
+        changed = sorted(path for path in hashes if path in self.hashes and hashes[path] != self.hashes[path])
+        removed = sorted(path for path in self.hashes if path not in hashes)
+        return added, changed, removed
@@ -1,14 +1,26 @@
 from neo4j import Driver, Transaction
+from BatchWriter import BatchWriter
+from GraphBackend import GraphBackend, as_backend
 
 class FolderManager():  
-    def __init__(self, driver: Driver, info_dict: dict, project_name: str):
-        self.driver = driver
+    def __init__(self, driver: Driver|GraphBackend, info_dict: dict, project_name: str, batch_size: int|None = None):
+        self.backend = as_backend(driver, batch_size)   # a neo4j driver is wrapped in a Neo4jBackend
         self.info_dict = info_dict
         self.project_name = project_name
+        self.batch_size = batch_size    # if set, the rows are written in batches instead of one query per node and edge
         
-    def create_folders(self) -> None:
-        with self.driver.session() as session:
-            session.execute_write(self._create_folder_nodes_and_relationships, self.info_dict, self.project_name)
+    def create_folders(self) -> dict:
+        if self.batch_size:
+            batch = BatchWriter(self.batch_size)
+            self._collect_folders(batch)
+            return self.backend.write(batch)
+        return self.backend.write_rows(self._create_folder_nodes_and_relationships, self.info_dict, self.project_name)
+
+    def _collect_folders(self, batch: BatchWriter) -> None:
+        # collects the folder nodes and their edges to the project
+        for folder in self.info_dict.keys():
+            batch.add_node("Folder", {"name": folder})
+            batch.add_relationship("Folder", {"name": folder}, "INCLUDED_IN", "Project", {"name": self.project_name})
 
 
     def _create_folder_nodes_and_relationships(self, tx: Transaction, info_dict: dict, project_name: str) -> None:
@@ -2,86 +2,103 @@ from neo4j import Driver, Transaction
 from DecoratorManager import DecoratorManager
 from ParameterManager import ParameterManager
 from TypeManager import TypeManager
-import json
+from BatchWriter import BatchWriter
+from GraphBackend import GraphBackend, as_backend
+from ApiModel import FunctionInfo, to_json
+from SymbolTable import SymbolTable
 
 class FunctionManager(): 
-    def __init__(self, driver: Driver|None = None, info_dict: dict|None = None):
-        self.driver = driver 
+    def __init__(self, driver: Driver|GraphBackend|None = None, info_dict: dict|None = None, batch_size: int|None = None,
+                 symbol_table: SymbolTable|None = None):
+        self.backend = as_backend(driver, batch_size)   # a neo4j driver is wrapped in a Neo4jBackend
         self.info_dict = info_dict
+        self.batch_size = batch_size    # if set, the rows are written in batches instead of one query per node and edge
+        self.symbol_table = symbol_table or SymbolTable(info_dict)  # resolves the parameter types to the declared classes
         self.DecoratorManager = DecoratorManager()
         self.ParameterManager = ParameterManager()
         self.TypeManager = TypeManager()
 
-    def create_functions(self) -> None: 
-        with self.driver.session() as session:
-            session.execute_write(self._create_functions)
+    def create_functions(self) -> dict: 
+        if self.batch_size:
+            batch = BatchWriter(self.batch_size)
+            self._collect_functions(batch)
+            return self.backend.write(batch)
+        return self.backend.write_rows(self._create_functions)
+
+    def _collect_functions(self, batch: BatchWriter) -> None:
+        # collects all functions declared in the files with their edges to the files
+        for nested_dict in self.info_dict.values():
+            for file_name, class_and_function_dicts in nested_dict.items():
+                for f in class_and_function_dicts["functions"]:
+                    self._collect_function(batch, f)
+                    batch.add_relationship("Function", {"uid": f.uid}, "DECLARED_AT", "File", {"name": file_name})
+
+    def _get_function_properties(self, function_info: FunctionInfo) -> dict:
+        # the properties that are set on a function node
+        return {"name": function_info.name, "comment": function_info.comment, "parameter": function_info.get_parameter_json(),
+                "decorators": to_json(function_info.decorators), "returns": function_info.get_returns_json()}
+
+    def _collect_function(self, batch: BatchWriter, function_info: FunctionInfo) -> None:
+        # collects the function node with its parameters, their types and its decorators
+        function_key = {"uid": function_info.uid}
+        batch.add_node("Function", function_key, self._get_function_properties(function_info))
+        for p in function_info.params:
+            self.ParameterManager._collect_parameter(batch, function_info.uid, p)
+            type_name = self.symbol_table.resolve(p.type, "Parameter", {"uid": p.uid}, "OF_TYPE")
+            if type_name:
+                self.TypeManager._collect_type(batch, p.uid, type_name)
+        for d in function_info.decorators:
+            self.DecoratorManager._collect_decorator(batch, d, "Function", function_key)
 
     def _create_functions(self, tx: Transaction) -> None:
         for nested_dict in self.info_dict.values():
             for file_name, class_and_function_dicts in nested_dict.items():
                 for f in class_and_function_dicts["functions"]:
                     # loops through all functions declared in the files and creates the nodes and relationships 
-                    function_name = f["name"]
-                    function_comment = f["comment"]
-                    parameter_dict = json.dumps(self.ParameterManager._parse_parameters(f["params"]))
-                    function_decorators = json.dumps(f["decorators"])
-                    function_return_type = json.dumps(f["return_type"])
-                    self._create_function_node(tx, function_name, function_comment, parameter_dict, function_decorators, function_return_type)
-                    self._create_function_file_relationship(tx, function_name, function_comment, parameter_dict, function_decorators, function_return_type, file_name)
+                    properties = self._get_function_properties(f)
+                    self._create_function_node(tx, f.uid, properties["name"], properties["comment"], properties["parameter"], properties["decorators"], properties["returns"])
+                    self._create_function_file_relationship(tx, f.uid, file_name)
                     self._create_function_inputs(tx, f)
 
-    def _create_function_node(self, tx: Transaction, function_name: str, function_comment: str,
+    def _create_function_node(self, tx: Transaction, function_uid: str, function_name: str, function_comment: str,
                               parameter_dict: str, decorator_list: str, return_type: str) -> None:
-        # creates the node of the function (if it does not already exist)
+        # creates the node of the function (if it does not already exist) and sets its properties
         query = """
-        MERGE (f:Function {name: $function_name, comment: $function_comment, parameter: $parameter_dict, decorators: $decorator_list, returns: $return_type})
+        MERGE (f:Function {uid: $function_uid})
+        SET f.name = $function_name, f.comment = $function_comment, f.parameter = $parameter_dict, f.decorators = $decorator_list, f.returns = $return_type
         RETURN f
         """
-        tx.run(query, function_name=function_name, function_comment=function_comment, parameter_dict=parameter_dict, decorator_list=decorator_list, return_type=return_type)
+        tx.run(query, function_uid=function_uid, function_name=function_name, function_comment=function_comment, parameter_dict=parameter_dict, decorator_list=decorator_list, return_type=return_type)
 
-    def _create_function_file_relationship(self, tx: Transaction, function_name: str, function_comment: str, 
-                                           parameter_dict: str, decorator_list: str, return_type: str, file_name: str) -> None: 
+    def _create_function_file_relationship(self, tx: Transaction, function_uid: str, file_name: str) -> None: 
         # creates the relationship between a function and the file it is declared at (if it does not already exist)
         query = """
-        MATCH (fo:File {name: $file_name}), (fi:Function {name: $function_name, comment: $function_comment, parameter: $parameter_dict, decorators: $decorator_list, returns: $return_type})
+        MATCH (fo:File {name: $file_name}), (fi:Function {uid: $function_uid})
         MERGE (fi)-[:DECLARED_AT]->(fo)
         """
-        tx.run(query, file_name=file_name, function_name=function_name, function_comment=function_comment, parameter_dict=parameter_dict, decorator_list=decorator_list, return_type=return_type)
+        tx.run(query, file_name=file_name, function_uid=function_uid)
     
-    def _create_function_class_relationship(self, tx: Transaction, function_name: str, function_comment: str, 
-                                            class_name: str, parameter_dict: str, decorator_list: str, return_type: str) -> None: 
+    def _create_function_class_relationship(self, tx: Transaction, function_uid: str, class_name: str) -> None: 
         # if the function is a method in a class, it creates this relationship (if it does not already exist)
         query = """
-        MATCH (fo:Class {name: $class_name}), (fi:Function {name: $function_name, comment: $function_comment, parameter: $parameter_dict, decorators: $decorator_list, returns: $return_type})
+        MATCH (fo:Class {name: $class_name}), (fi:Function {uid: $function_uid})
         MERGE (fo)-[:HAS]->(fi)
         """
-        tx.run(query, class_name=class_name, function_name=function_name, function_comment=function_comment, parameter_dict=parameter_dict, decorator_list=decorator_list, return_type=return_type)
+        tx.run(query, class_name=class_name, function_uid=function_uid)
 
-    def _create_function_inputs(self, tx: Transaction, function_dict: dict) -> None: 
+    def _create_function_inputs(self, tx: Transaction, function_info: FunctionInfo) -> None: 
         # creates the nodes and relationships for the function inputs
         from ClassManager import ClassManager
-        function_name = function_dict["name"]
-        function_comment = function_dict["comment"]
-        parameter_dict = json.dumps(self.ParameterManager._parse_parameters(function_dict["params"]))
-        function_decorators = json.dumps(function_dict["decorators"])
-        function_return_type = json.dumps(function_dict["return_type"])
-        for p in function_dict["params"]:
-            parameter_name = p["name"]
-            parameter_comment = p["comment"]
-            parameter_type = json.dumps(p["type"])
-            parameter_default = json.dumps(p["default"])
-            self.ParameterManager._create_parameter_node(tx, parameter_name, parameter_comment, parameter_type, parameter_default) 
-            self.ParameterManager._create_parameter_function_relationship(tx,  function_name, function_comment, parameter_dict, function_decorators, function_return_type, parameter_name, parameter_comment, parameter_type, parameter_default)
-            type_name = parameter_type
-            if "." in parameter_type: 
-                modules = p["type"].split(".")
-                type_name = modules[-1]
-            ClassManager._create_class_node(tx, class_name=type_name)   # also creates class nodes for types
-            self.TypeManager._create_type_relationship(tx, parameter_name, parameter_comment, parameter_type, parameter_default, type_name)
+        function_uid = function_info.uid
+        for p in function_info.params:
+            properties = self.ParameterManager._get_parameter_properties(p)
+            self.ParameterManager._create_parameter_node(tx, p.uid, properties["name"], properties["comment"], properties["type"], properties["default"]) 
+            self.ParameterManager._create_parameter_function_relationship(tx, function_uid, p.uid)
+            type_name = self.symbol_table.resolve(p.type, "Parameter", {"uid": p.uid}, "OF_TYPE")
+            if type_name:
+                ClassManager._create_class_node(tx, class_name=type_name)   # declared, but maybe in a file of another chunk
+                self.TypeManager._create_type_relationship(tx, p.uid, type_name)
 
-        for d in function_dict["decorators"]:
+        for d in function_info.decorators:
             self.DecoratorManager._create_decorator_node(tx, decorator_name=d)
-            self.DecoratorManager._create_decorator_function_relationship(tx, d, function_name, function_comment, parameter_dict, function_decorators, function_return_type)
-
-
-
+            self.DecoratorManager._create_decorator_function_relationship(tx, d, function_uid)
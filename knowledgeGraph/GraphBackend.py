@@ -0,0 +1,296 @@
+import threading
+from abc import ABC, abstractmethod
+from neo4j import Driver, Transaction
+from BatchWriter import BatchWriter, CountingTransaction
+from SchemaManager import SchemaManager
+
+
+class GraphBackend(ABC):
+    # the store the managers write to
+    supports_rows = True    # False if only the batched mode can be written, the managers then need a batch_size
+
+    @abstractmethod
+    def create_schema(self) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, batch: BatchWriter) -> dict:
+        # writes the collected rows of the batched mode and returns their stats
+        pass
+
+    @abstractmethod
+    def write_rows(self, function, *args) -> dict:
+        # runs a transaction function of the per-row mode and returns its stats
+        pass
+
+    @abstractmethod
+    def read_declared_classes(self) -> dict:
+        # file name -> names of the classes (also the nested ones) that are declared at the file
+        pass
+
+    @abstractmethod
+    def read_graph_classes(self) -> list:
+        # every top-level class with the folder of its file and the name chains of its nested classes, see SymbolTable.add_graph_classes
+        pass
+
+    @abstractmethod
+    def delete_files(self, file_names: list) -> None:
+        # removes the functions, parameters, class properties and class edges that were declared in the files, and the files themselves
+        pass
+
+    @abstractmethod
+    def delete_orphans(self) -> None:
+        # removes the classes that no file declares anymore and the decorators that are not connected, a full build would not have created them
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class Neo4jBackend(GraphBackend):
+    # writes to a Neo4j database through the driver
+    def __init__(self, driver: Driver) -> None:
+        self.driver = driver
+
+    def create_schema(self) -> None:
+        schema_manager = SchemaManager(self.driver)
+        schema_manager.create_schema()     # the lookups on name need the indexes, otherwise every MERGE scans the whole label
+        schema_manager.report_indexes()
+
+    def write(self, batch: BatchWriter) -> dict:
+        with self.driver.session() as session:
+            session.execute_write(batch.write)
+        return batch.get_stats()
+
+    def write_rows(self, function, *args) -> dict:
+        with self.driver.session() as session:
+            return session.execute_write(CountingTransaction.count, function, *args)
+
+    def read_declared_classes(self) -> dict:
+        query = """
+        MATCH (c:Class)-[:DECLARED_AT]->(fi:File)
+        RETURN fi.name AS file_name, collect(DISTINCT c.name) AS class_names
+        """
+        with self.driver.session() as session:
+            records = session.execute_read(lambda tx: list(tx.run(query)))
+        return {record["file_name"]: set(record["class_names"]) for record in records}
+
+    def read_graph_classes(self) -> list:
+        query = """
+        MATCH (c:Class)-[:DECLARED_AT]->(:File)-[:INCLUDED_IN]->(fo:Folder)
+        WHERE NOT (:Class)-[:HAS]->(c)
+        OPTIONAL MATCH path = (c)-[:HAS*]->(:Class)
+        WITH fo, c, collect(path) AS paths
+        RETURN fo.name AS folder, c.name AS name, [p IN paths | [n IN nodes(p) | n.name]] AS nested
+        """
+        with self.driver.session() as session:
+            return session.execute_read(lambda tx: [record.data() for record in tx.run(query)])
+
+    def delete_files(self, file_names: list) -> None:
+        with self.driver.session() as session:
+            session.execute_write(self._delete_files, file_names)
+
+    def delete_orphans(self) -> None:
+        with self.driver.session() as session:
+            session.execute_write(self._delete_orphans)
+
+    @staticmethod
+    def _delete_files(tx: Transaction, file_names: list) -> None:
+        query_parameters = """
+        UNWIND $file_names AS file_name
+        MATCH (:File {name: file_name})<-[:DECLARED_AT]-(owner)-[:HAS*0..1]->(f:Function)-[:HAS]->(p:Parameter)
+        WITH DISTINCT p
+        DETACH DELETE p
+        """
+        query_functions = """
+        UNWIND $file_names AS file_name
+        MATCH (:File {name: file_name})<-[:DECLARED_AT]-(owner)-[:HAS*0..1]->(f:Function)
+        WITH DISTINCT f
+        DETACH DELETE f
+        """
+        query_classes = """
+        UNWIND $file_names AS file_name
+        MATCH (:File {name: file_name})<-[:DECLARED_AT]-(c:Class)
+        WITH DISTINCT c
+        REMOVE c.comment, c.attributes
+        WITH c
+        MATCH (c)-[r:INHERITS_FROM|HAS]->()
+        DELETE r
+        """
+        query_files = """
+        UNWIND $file_names AS file_name
+        MATCH (fi:File {name: file_name})
+        DETACH DELETE fi
+        """
+        for query in [query_parameters, query_functions, query_classes, query_files]:
+            tx.run(query, file_names=file_names)
+
+    @staticmethod
+    def _delete_orphans(tx: Transaction) -> None:
+        # the references of unchanged files to a class that was removed point to a class without a file
+        query_classes = """
+        MATCH (c:Class)
+        WHERE NOT (c)-[:DECLARED_AT]->(:File)
+        DETACH DELETE c
+        """
+        query_decorators = """
+        MATCH (d:Decorator)
+        WHERE NOT (d)--()
+        DELETE d
+        """
+        for query in [query_classes, query_decorators]:
+            tx.run(query)
+
+    def close(self) -> None:
+        self.driver.close()
+
+
+class InMemoryBackend(GraphBackend):
+    # indexed adjacency store with the MERGE semantics of the batched Cypher: nodes are deduped by label and key,
+    # properties are overwritten by later rows and relationships are only created once and only between existing nodes
+    supports_rows = False   # the per-row mode runs Cypher transaction functions, which need a database
+
+    def __init__(self) -> None:
+        self.nodes = {}     # label -> {(key properties, key values): properties}
+        self.outgoing = {}  # (label, key properties, key values) -> {relationship type: {target node ids}}
+        self.incoming = {}  # (label, key properties, key values) -> {relationship type: {source node ids}}
+        self.lock = threading.Lock()    # the streaming mode writes from several threads
+
+    def create_schema(self) -> None:
+        pass    # the nodes are indexed by their keys anyway
+
+    def write(self, batch: BatchWriter) -> dict:
+        query_count = 0
+        with self.lock:
+            for (label, keys, _), rows in batch.nodes.items():
+                label_nodes = self.nodes.setdefault(label, {})
+                for key_values, row in rows.items():
+                    label_nodes.setdefault((keys, key_values), {}).update(row)
+                query_count += self._count_statements(batch, rows)
+            for (source_label, source_keys, relationship_type, target_label, target_keys), rows in batch.relationships.items():
+                for source_values, target_values in rows.keys():
+                    source_id, target_id = (source_label, source_keys, source_values), (target_label, target_keys, target_values)
+                    if not (self.contains(source_id) and self.contains(target_id)):
+                        continue    # the MATCH does not find the nodes
+                    self.outgoing.setdefault(source_id, {}).setdefault(relationship_type, set()).add(target_id)
+                    self.incoming.setdefault(target_id, {}).setdefault(relationship_type, set()).add(source_id)
+                query_count += self._count_statements(batch, rows)
+        batch.query_count = query_count     # the statements the Neo4j backend would have sent
+        return batch.get_stats()
+
+    def write_rows(self, function, *args) -> dict:
+        raise ValueError(f"{type(self).__name__} only supports the batched mode, set a batch size.")
+
+    def read_declared_classes(self) -> dict:
+        declared = {}
+        for (label, _, key_values), targets in self.outgoing.items():
+            if label == "Class":
+                for _, _, file_values in targets.get("DECLARED_AT", set()):
+                    declared.setdefault(file_values[0], set()).add(key_values[0])
+        return declared
+
+    def read_graph_classes(self) -> list:
+        records = []
+        for class_id, targets in self.outgoing.items():
+            if class_id[0] != "Class" or self._get_sources(class_id, "HAS", "Class"):
+                continue    # only the top-level classes
+            for file_id in targets.get("DECLARED_AT", set()):
+                for folder_id in self.outgoing.get(file_id, {}).get("INCLUDED_IN", set()):
+                    records.append({"folder": folder_id[2][0], "name": class_id[2][0], "nested": self._get_chains([class_id])})
+        return records
+
+    def _get_sources(self, node_id: tuple, relationship_type: str, label: str) -> list:
+        return [source_id for source_id in self.incoming.get(node_id, {}).get(relationship_type, set()) if source_id[0] == label]
+
+    def _get_targets(self, node_id: tuple, relationship_type: str, label: str) -> list:
+        return [target_id for target_id in self.outgoing.get(node_id, {}).get(relationship_type, set()) if target_id[0] == label]
+
+    def _get_chains(self, path: list) -> list:
+        # the name chains of the paths (c)-[:HAS*]->(:Class)
+        chains = []
+        for nested_id in self._get_targets(path[-1], "HAS", "Class"):
+            chains.append([node_id[2][0] for node_id in path + [nested_id]])
+            chains += self._get_chains(path + [nested_id])
+        return chains
+
+    def delete_files(self, file_names: list) -> None:
+        # the same steps as the Cypher of the Neo4j backend
+        with self.lock:
+            file_ids = [file_id for file_id in self._get_node_ids("File") if file_id[2][0] in file_names]
+            owner_ids = {owner_id for file_id in file_ids for owner_id in self.incoming.get(file_id, {}).get("DECLARED_AT", set())}
+            function_ids = {owner_id for owner_id in owner_ids if owner_id[0] == "Function"}
+            function_ids |= {function_id for owner_id in owner_ids for function_id in self._get_targets(owner_id, "HAS", "Function")}
+            for function_id in function_ids:
+                for parameter_id in self._get_targets(function_id, "HAS", "Parameter"):
+                    self._delete_node(parameter_id)
+            for function_id in function_ids:
+                self._delete_node(function_id)
+            for class_id in {owner_id for owner_id in owner_ids if owner_id[0] == "Class"}:
+                properties = self.nodes["Class"][class_id[1:]]
+                properties.pop("comment", None)
+                properties.pop("attributes", None)
+                for relationship_type in ["INHERITS_FROM", "HAS"]:
+                    for target_id in self.outgoing.get(class_id, {}).pop(relationship_type, set()):
+                        self.incoming[target_id][relationship_type].discard(class_id)
+            for file_id in file_ids:
+                self._delete_node(file_id)
+
+    def delete_orphans(self) -> None:
+        with self.lock:
+            for class_id in self._get_node_ids("Class"):
+                if not self._get_targets(class_id, "DECLARED_AT", "File"):
+                    self._delete_node(class_id)
+            for decorator_id in self._get_node_ids("Decorator"):
+                if not any(self.outgoing.get(decorator_id, {}).values()) and not any(self.incoming.get(decorator_id, {}).values()):
+                    self._delete_node(decorator_id)
+
+    def _get_node_ids(self, label: str) -> list:
+        return [(label, keys, key_values) for keys, key_values in self.nodes.get(label, {})]
+
+    def _delete_node(self, node_id: tuple) -> None:
+        # like DETACH DELETE
+        for relationship_type, target_ids in self.outgoing.pop(node_id, {}).items():
+            for target_id in target_ids:
+                self.incoming.get(target_id, {}).get(relationship_type, set()).discard(node_id)
+        for relationship_type, source_ids in self.incoming.pop(node_id, {}).items():
+            for source_id in source_ids:
+                self.outgoing.get(source_id, {}).get(relationship_type, set()).discard(node_id)
+        del self.nodes[node_id[0]][node_id[1:]]
+
+    @staticmethod
+    def _count_statements(batch: BatchWriter, rows: dict) -> int:
+        return -(-len(rows) // batch.batch_size)
+
+    def contains(self, node_id: tuple) -> bool:
+        label, keys, key_values = node_id
+        return (keys, key_values) in self.nodes.get(label, {})
+
+    def get_node(self, label: str, key: dict) -> dict|None:
+        # returns the properties of a node, for example get_node("Class", {"name": "Atom"})
+        return self.nodes.get(label, {}).get((tuple(key), tuple(key.values())))
+
+    def get_neighbors(self, label: str, key: dict, relationship_type: str, outgoing: bool = True) -> list:
+        # returns the properties of the nodes at the other end of the relationships of a node
+        adjacency = self.outgoing if outgoing else self.incoming
+        node_ids = adjacency.get((label, tuple(key), tuple(key.values())), {}).get(relationship_type, set())
+        return [self.nodes[other_label][(keys, key_values)] for other_label, keys, key_values in node_ids]
+
+    def get_graph(self) -> tuple[dict, dict]:
+        # the graph in the format of BulkExporter.get_graph, so both can be compared
+        nodes = {label: {key_values[0]: properties for (_, key_values), properties in label_nodes.items()}
+                 for label, label_nodes in self.nodes.items()}
+        relationships = {}
+        for (source_label, _, source_values), targets in self.outgoing.items():
+            for relationship_type, target_ids in targets.items():
+                for target_label, _, target_values in target_ids:
+                    relationships.setdefault((source_label, relationship_type, target_label), set()).add((source_values[0], target_values[0]))
+        return nodes, relationships
+
+
+def as_backend(driver: Driver|GraphBackend|None, batch_size: int|None = None) -> GraphBackend|None:
+    # the managers accept a neo4j driver or a backend, a backend without the per-row mode is refused before anything is written
+    if isinstance(driver, GraphBackend) and not driver.supports_rows and not batch_size:
+        raise ValueError(f"{type(driver).__name__} only supports the batched mode, set a batch size.")
+    if driver is None or isinstance(driver, GraphBackend):
+        return driver
+    return Neo4jBackend(driver)
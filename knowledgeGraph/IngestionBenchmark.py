@@ -0,0 +1,176 @@
+import os
+import ast
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+from DocParser import DocParser
+from ClassAndFunctionVisitor import ClassAndFunctionVisitor
+from KnowledgeGraphManager import KnowledgeGraphManager
+from GraphBackend import InMemoryBackend
+
+
+class SyntheticDocGenerator():
+    # writes Doxygen-style .doc.py files like the ones of the CDPKit Python API with a configurable size
+    TYPES = ["int", "float", "str", "bool", "Chem.Atom", "Chem.MolecularGraph", "Math.Vector3D", "Base.IStream"]
+
+    def __init__(self, classes_per_file: int = 5, methods_per_class: int = 10, parameters_per_method: int = 3,
+                 nested_classes: int = 1, functions_per_file: int = 5, seed: int = 0) -> None:
+        self.classes_per_file = classes_per_file
+        self.methods_per_class = methods_per_class
+        self.parameters_per_method = parameters_per_method  # without self
+        self.nested_classes = nested_classes    # classes inside every top level class
+        self.functions_per_file = functions_per_file    # free functions outside of the classes
+        self.random = random.Random(seed)   # the same seed always generates the same files
+
+    def generate_tree(self, root_dir: str, folders: int, files_per_folder: int) -> list:
+        # writes the files to root_dir/CDPL/Folder<i>/ and returns the directories, the parser takes the folder names from the CDPL/ part
+        dir_paths = []
+        for i in range(folders):
+            dir_path = os.path.join(root_dir, "CDPL", f"Folder{i}")
+            os.makedirs(dir_path, exist_ok=True)
+            for j in range(files_per_folder):
+                with open(os.path.join(dir_path, f"File{j}.doc.py"), "w") as f:
+                    f.write(self.generate_file(f"F{i}x{j}"))
+            dir_paths.append(dir_path)
+        return dir_paths
+
+    def generate_file(self, prefix: str) -> str:
+        lines = ["#", "# Synthetic documentation file", "#", ""]
+        for i in range(self.classes_per_file):
+            lines += self._generate_class(f"{prefix}Class{i}", "", self.nested_classes)
+        for i in range(self.functions_per_file):
+            lines += self._generate_function(f"{prefix.lower()}Function{i}", "", None)
+        return "\n".join(lines) + "\n"
+
+    def _generate_class(self, name: str, indent: str, nested_classes: int) -> list:
+        lines = self._comment_block(indent, f"A synthetic class {name}.", [])
+        lines.append(f"{indent}class {name}(Boost.Python.instance):")
+        lines.append("")
+        for i in range(self.methods_per_class):
+            lines += self._generate_function("__init__" if i == 0 else f"method{i}", indent + "    ", name)
+        for i in range(nested_classes):
+            lines += self._generate_class(f"{name}Nested{i}", indent + "    ", 0)
+        lines += self._comment_block(indent + "    ", f"The object id of {name}.", [])
+        lines.append(f"{indent}    objectID = property(getObjectID)")
+        lines.append("")
+        return lines
+
+    def _generate_function(self, name: str, indent: str, owner: str|None) -> list:
+        parameters = [("self", owner)] if owner else []
+        parameters += [(f"arg{i}", self.random.choice(self.TYPES)) for i in range(self.parameters_per_method)]
+        signature = ", ".join(f"{p}: {t}" for p, t in parameters)
+        if parameters and self.random.random() < 0.5:
+            signature += " = 0"     # default of the last parameter
+        lines = self._comment_block(indent, f"Synthetic function {name}.", [p for p, _ in parameters])
+        lines.append(f"{indent}def {name}({signature}) -> {self.random.choice(self.TYPES)}: pass")
+        lines.append("")
+        return lines
+
+    @staticmethod
+    def _comment_block(indent: str, brief: str, parameter_names: list) -> list:
+        lines = [f"{indent}##", f"{indent}# \\brief {brief}"]
+        for name in parameter_names:
+            lines.append(f"{indent}# \\param {name} The \\e {name} argument.")
+        if parameter_names:
+            lines.append(f"{indent}# \\return The result.")
+        lines.append(f"{indent}#")
+        return lines
+
+
+class IngestionBenchmark():
+    # times the tokenization, the AST parsing, the visitor and the graph writes of the parser and managers separately
+    # the graph is written to an InMemoryBackend, so the numbers do not depend on a database
+    def __init__(self, dir_paths: list, batch_size: int = 1000) -> None:
+        self.dir_paths = dir_paths
+        self.batch_size = batch_size
+        self.parser = DocParser("", {})
+
+    def run(self) -> dict:
+        stats = {}
+        jobs = self.parser.get_jobs(self.dir_paths)
+        contents = []
+        start = time.perf_counter()
+        for file_path, folder in jobs:
+            with open(file_path, "r") as f:
+                contents.append((file_path, folder, f.read()))
+        stats["read"] = self._get_stage_stats(start, len(contents), sum(len(content) for _, _, content in contents), "bytes")
+
+        start = time.perf_counter()
+        comments = [self.parser.extract_comments(content) for _, _, content in contents]
+        stats["tokenize"] = self._get_stage_stats(start, len(contents), sum(len(c) for c in comments), "comments")
+
+        start = time.perf_counter()
+        trees = []
+        for file_path, _, content in contents:
+            try:
+                trees.append(ast.parse(content))
+            except SyntaxError:
+                trees.append(self.parser.repair_syntax(content, file_path))     # None if the file could not be repaired
+        stats["ast_parse"] = self._get_stage_stats(start, len(contents), sum(tree is not None for tree in trees), "trees")
+
+        start = time.perf_counter()
+        info_dict = {}
+        for (file_path, folder, _), file_comments, tree in zip(contents, comments, trees):
+            if tree is None:
+                continue
+            file_name = self.parser.extract_doc_py_filename(file_path)
+            visitor = ClassAndFunctionVisitor(file_comments, module=f"{folder}/{file_name}")
+            visitor.visit(tree)
+            info_dict.setdefault(folder, {})[file_name] = {"classes": visitor.classes, "functions": visitor.functions}
+        stats["visit"] = self._get_stage_stats(start, len(contents), sum(len(info["classes"]) + len(info["functions"])
+                                                                          for files_info in info_dict.values() for info in files_info.values()), "definitions")
+
+        backend = InMemoryBackend()
+        start = time.perf_counter()
+        write_stats = KnowledgeGraphManager(None, None, None, "Benchmark", info_dict, self.batch_size, backend).create_graph()
+        node_count = sum(len(label_nodes) for label_nodes in backend.nodes.values())
+        stats["graph_write"] = self._get_stage_stats(start, len(contents), node_count, "nodes")
+        stats["graph_write"]["rows"] = sum(stage_stats["rows"] for stage_stats in write_stats.values())
+        stats["graph_write"]["relationships"] = sum(len(targets) for adjacency in backend.outgoing.values() for targets in adjacency.values())
+        return stats
+
+    @staticmethod
+    def _get_stage_stats(start: float, file_count: int, item_count: int, item_name: str) -> dict:
+        # the peak RSS is the maximum of the process up to the end of the stage, so it can only grow from stage to stage
+        seconds = time.perf_counter() - start
+        return {"seconds": seconds, "files": file_count, "files_per_second": file_count / seconds if seconds else None,
+                item_name: item_count, f"{item_name}_per_second": item_count / seconds if seconds else None,
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}   # kilobytes on Linux
+
+
+def get_commit() -> str|None:
+    # the commit the benchmark ran on, so that the results of several commits can be compared
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion of synthetic .doc.py files")
+    parser.add_argument("--root-dir", default="benchmark_data", help="Directory for the generated files")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to")
+    parser.add_argument("--folders", type=int, default=4)
+    parser.add_argument("--files-per-folder", type=int, default=50)
+    parser.add_argument("--classes-per-file", type=int, default=5)
+    parser.add_argument("--methods-per-class", type=int, default=10)
+    parser.add_argument("--parameters-per-method", type=int, default=3)
+    parser.add_argument("--nested-classes", type=int, default=1)
+    parser.add_argument("--functions-per-file", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = SyntheticDocGenerator(args.classes_per_file, args.methods_per_class, args.parameters_per_method,
+                                      args.nested_classes, args.functions_per_file, args.seed)
+    dir_paths = generator.generate_tree(args.root_dir, args.folders, args.files_per_folder)
+    results = {"commit": get_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": vars(args),
+               "stages": IngestionBenchmark(dir_paths, args.batch_size).run()}
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    for stage, stage_stats in results["stages"].items():
+        print(f"{stage}: {stage_stats['seconds']:.3f} s, {stage_stats['files_per_second'] or 0:.0f} files/s, {stage_stats['peak_rss_mb']:.0f} MB peak RSS")
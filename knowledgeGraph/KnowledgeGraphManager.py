@@ -1,34 +1,75 @@
-from neo4j import GraphDatabase, Transaction
+from neo4j import GraphDatabase, AsyncGraphDatabase, Transaction
 from DocParser import DocParser
 from ProjectManager import ProjectManager
 from FolderManager import FolderManager
 from FileManager import FileManager
 from ClassManager import ClassManager
 from FunctionManager import FunctionManager
+from FileManifest import FileManifest
+from BulkExporter import BulkExporter
+from StreamingIngestor import StreamingIngestor
+from DeltaApplier import DeltaApplier
+from AsyncIngestor import AsyncIngestor
+from ChunkedWriter import ChunkedWriter
+from SchemaManager import SchemaManager
+from SymbolTable import SymbolTable
+from GraphBackend import GraphBackend, Neo4jBackend
 import os
+import time
+import asyncio
 
 
 class KnowledgeGraphManager(): 
     # responsible for calling the submanagers
-    def __init__(self, uri: str, user: str, password: str, project_name: str, info_dict: dict):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.project_manager = ProjectManager(self.driver, project_name)    # handles project nodes and edges 
-        self.folder_manager = FolderManager(self.driver, info_dict, project_name)   # handles folder nodes and edges
-        self.file_manager = FileManager(self.driver, info_dict )    # handles file nodes and edges
-        self.class_manager = ClassManager(self.driver, info_dict)   # handles class nodes and edges
-        self.function_manager = FunctionManager(self.driver, info_dict) # handles function nodes and edges 
+    def __init__(self, uri: str, user: str, password: str, project_name: str, info_dict: dict, batch_size: int|None = None,
+                 backend: GraphBackend|None = None):
+        # if batch_size is set, the managers write their rows with batched UNWIND statements instead of one query per node and edge
+        # if backend is set, the graph is written to it instead of the database at uri, the in-memory backend needs a batch_size
+        self.backend = backend or Neo4jBackend(GraphDatabase.driver(uri, auth=(user, password)))
+        self.driver = getattr(self.backend, "driver", None)     # only the Neo4j backend can clean the graph
+        self.project_manager = ProjectManager(self.backend, project_name, batch_size)    # handles project nodes and edges 
+        self.folder_manager = FolderManager(self.backend, info_dict, project_name, batch_size)   # handles folder nodes and edges
+        self.file_manager = FileManager(self.backend, info_dict, batch_size)    # handles file nodes and edges
+        self.symbol_table = SymbolTable(info_dict)  # resolves the bases and parameter types to the declared classes
+        self.class_manager = ClassManager(self.backend, info_dict, batch_size, self.symbol_table)   # handles class nodes and edges
+        self.function_manager = FunctionManager(self.backend, info_dict, batch_size, self.symbol_table) # handles function nodes and edges 
         self.info_dict = info_dict  # dict from DocParser
+        self.batch_size = batch_size
 
     def close(self) -> None:
-        self.driver.close()
+        self.backend.close()
     
-    def create_graph(self) -> None:
-        # workflow to create entire knowledge graph
-        self.project_manager.create_project()
-        self.folder_manager.create_folders()
-        self.file_manager.create_files()
-        self.class_manager.create_classes()
-        self.function_manager.create_functions()
+    def create_graph(self) -> dict:
+        # workflow to create entire knowledge graph, returns the wall time, row count and query count of every stage
+        self.backend.create_schema()     # constraints and indexes
+        stages = [("project", self.project_manager.create_project),
+                  ("folders", self.folder_manager.create_folders),
+                  ("files", self.file_manager.create_files),
+                  ("classes", self.class_manager.create_classes),
+                  ("functions", self.function_manager.create_functions)]
+        stats = {}
+        for stage, create in stages:
+            start = time.perf_counter()
+            stats[stage] = create()
+            stats[stage]["seconds"] = time.perf_counter() - start
+            print_stage(stage, stats[stage])
+        self.project_manager.stamp_version()
+        self.symbol_table.report()
+        return stats
+
+    def create_graph_chunked(self, chunk_files: int = 50, chunk_rows: int = 50000, checkpoint_path: str|None = None) -> dict:
+        # like create_graph, but commits a transaction every chunk_files files or chunk_rows rows and resumes from the checkpoint
+        self.backend.create_schema()
+        stats = {"project": self.project_manager.create_project()}
+        start = time.perf_counter()
+        writer = ChunkedWriter(self.backend, self.info_dict, self.project_manager.project_name, self.batch_size or 1000,
+                               chunk_files, chunk_rows, checkpoint_path)
+        stats["chunks"] = writer.write()
+        stats["chunks"]["seconds"] = time.perf_counter() - start
+        print_stage("chunks", stats["chunks"])
+        self.project_manager.stamp_version()
+        writer.symbol_table.report()
+        return stats
 
     def clean_database(self) -> None:
         # removes all nodes and edges from the graph database
@@ -44,12 +85,164 @@ class KnowledgeGraphManager():
         """
         tx.run(query)
 
+    def update_graph(self, file_names: list) -> None:
+        # replaces the subgraphs of the given files, the info dict has to hold every current file with one of these names
+        # (files with the same name in different folders share their File node, so they are always replaced together)
+        # the files have to include every file that declares a class of the same name, see get_update_files
+        self.backend.delete_files(file_names)
+        self.symbol_table.add_graph_classes(self.backend)    # the bases and types can be declared in files that were not reparsed
+        self.create_graph()
+        self.backend.delete_orphans()
+        self.project_manager.stamp_version()    # again, as the orphans were deleted after create_graph
+
+
+def print_stage(stage: str, stage_stats: dict) -> None:
+    print(f"Stage {stage}: {stage_stats['seconds']:.2f} s, " + ", ".join(f"{value} {key}" for key, value in stage_stats.items() if key != "seconds"))
+
+
+def build_graph(uri: str, user: str, password: str, project_name: str, dir_paths: list,
+                batch_size: int|None = None, workers: int = 1, cache_dir: str|None = None, backend: GraphBackend|None = None,
+                chunk_files: int|None = None, chunk_rows: int = 50000, checkpoint_path: str|None = None) -> dict:
+    # parses all folders and builds the graph with a single driver, so every stage runs once over the merged data
+    # with an InMemoryBackend the whole build runs without a database, e.g. to profile the parse-to-graph throughput
+    # with chunk_files, the files are committed in chunks instead of one transaction per stage (see create_graph_chunked)
+    start = time.perf_counter()
+    all_files_info = DocParser("", {}, workers=workers, cache_dir=cache_dir).parse_dirs(dir_paths)
+    parse_stats = {"seconds": time.perf_counter() - start, "folders": len(all_files_info), 
+                   "files": sum(len(files_info) for files_info in all_files_info.values())}
+    print_stage("parse", parse_stats)
+
+    graph_manager = KnowledgeGraphManager(uri, user, password, project_name, all_files_info, batch_size, backend)
+    try:
+        if chunk_files:
+            stats = {"parse": parse_stats, **graph_manager.create_graph_chunked(chunk_files, chunk_rows, checkpoint_path)}
+        else:
+            stats = {"parse": parse_stats, **graph_manager.create_graph()}
+    finally:
+        graph_manager.close()
+    print(f"Total: {time.perf_counter() - start:.2f} s")
+    return stats
+
+
+def stream_graph(uri: str, user: str, password: str, project_name: str, dir_paths: list, batch_size: int = 1000, 
+                 workers: int = 1, cache_dir: str|None = None, writers: int = 2, queue_size: int = 8, chunk_files: int = 20,
+                 backend: GraphBackend|None = None) -> dict:
+    # parses and writes at the same time, the memory is bounded by the queue and the first files are queryable before the last ones are parsed
+    start = time.perf_counter()
+    parser = DocParser("", {}, workers=workers, cache_dir=cache_dir)
+    graph_manager = KnowledgeGraphManager(uri, user, password, project_name, {}, batch_size, backend)
+    try:
+        graph_manager.backend.create_schema()
+        graph_manager.project_manager.create_project()
+        ingestor = StreamingIngestor(graph_manager.backend, project_name, batch_size, writers, queue_size, chunk_files)
+        stats = ingestor.ingest(parser.iter_jobs(parser.get_jobs(dir_paths)))
+        graph_manager.project_manager.stamp_version()
+    finally:
+        graph_manager.close()
+    stats["seconds"] = time.perf_counter() - start
+    print_stage("stream", stats)
+    ingestor.symbol_table.report()
+    return stats
+
+
+def async_graph(uri: str, user: str, password: str, project_name: str, dir_paths: list, batch_size: int = 1000,
+                workers: int = 1, cache_dir: str|None = None, concurrency: int = 4, partition_files: int = 50) -> dict:
+    # parses all folders and writes the partitions of files concurrently, so the build is bound by the server and not by the latency
+    start = time.perf_counter()
+    all_files_info = DocParser("", {}, workers=workers, cache_dir=cache_dir).parse_dirs(dir_paths)
+    with GraphDatabase.driver(uri, auth=(user, password)) as driver:
+        SchemaManager(driver).create_schema()
+
+    async def ingest() -> dict:
+        async with AsyncGraphDatabase.driver(uri, auth=(user, password)) as driver:
+            return await AsyncIngestor(driver, all_files_info, project_name, batch_size, concurrency, partition_files).ingest()
+
+    stats = asyncio.run(ingest())
+    with GraphDatabase.driver(uri, auth=(user, password)) as driver:
+        ProjectManager(driver, project_name).stamp_version()
+    stats["seconds"] = time.perf_counter() - start
+    print_stage("async", stats)
+    return stats
+
+
+def delta_graph(uri: str, user: str, password: str, project_name: str, dir_paths: list, batch_size: int = 1000,
+                workers: int = 1, cache_dir: str|None = None, dry_run: bool = False) -> dict:
+    # parses all folders and only writes the nodes, properties and relationships that differ from the database
+    start = time.perf_counter()
+    all_files_info = DocParser("", {}, workers=workers, cache_dir=cache_dir).parse_dirs(dir_paths)
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    try:
+        stats = DeltaApplier(driver, all_files_info, project_name, batch_size).apply(dry_run)
+        if stats.get("queries"):    # not set by a dry run
+            ProjectManager(driver, project_name).stamp_version()
+    finally:
+        driver.close()
+    stats["seconds"] = time.perf_counter() - start
+    print_stage("delta (dry run)" if dry_run else "delta", stats)
+    return stats
+
+
+def get_declared_classes(info_dict: dict) -> dict:
+    # file name -> names of the classes (also the nested ones) that are declared in the parsed file
+    declared = {}
+
+    def add_classes(file_name: str, classes: list) -> None:
+        for c in classes:
+            declared.setdefault(file_name, set()).add(c.name)
+            add_classes(file_name, c.nested_classes)
+
+    for files_info in info_dict.values():
+        for file_name, file_info in files_info.items():
+            add_classes(file_name, file_info["classes"])
+    return declared
+
+
+def get_update_files(graph_classes: dict, parsed_classes: dict, file_names: set) -> set:
+    # the files that declare a class with the name of a class of the given files, before or after the change
+    # the Class nodes are shared by name (e.g. the nested Type of Atom and Bond), replacing one file removes the methods and edges
+    # that the other files added to them, so these files are reparsed as well
+    class_names = set().union(*[graph_classes.get(file_name, set()) | parsed_classes.get(file_name, set()) for file_name in file_names])
+    return file_names | {file_name for file_name, names in graph_classes.items() if names & class_names}
+
+
+def update_from_manifest(uri: str, user: str, password: str, project_name: str, dir_paths: list, manifest_path: str,
+                         batch_size: int|None = None, workers: int = 1, cache_dir: str|None = None,
+                         backend: GraphBackend|None = None) -> None:
+    # reparses and replaces only the files that were added, changed or removed since the last run
+    # and the files that share a class with them, references of unchanged files to newly added classes are not resolved
+    manifest = FileManifest(manifest_path)
+    parser = DocParser("", {}, workers=workers, cache_dir=cache_dir)
+    file_folders = {file_path: parser.extract_cdpl_substring(dir_path) 
+                    for dir_path in dir_paths for file_path in parser.get_file_list(dir_path)}
+    hashes = manifest.compute_hashes(list(file_folders))
+    added, changed, removed = manifest.diff(hashes)
+    print(f"Files added: {len(added)}, changed: {len(changed)}, removed: {len(removed)}")
+    if not (added or changed or removed):
+        return
+
+    graph_manager = KnowledgeGraphManager(uri, user, password, project_name, {}, batch_size, backend)
+    try:
+        graph_classes = graph_manager.backend.read_declared_classes()
+        file_names, parsed_names = {parser.extract_doc_py_filename(file_path) for file_path in added + changed + removed}, set()
+        while file_names != parsed_names:   # the reparsed files can declare further shared classes
+            parser.parse_jobs([(file_path, folder) for file_path, folder in file_folders.items() 
+                               if parser.extract_doc_py_filename(file_path) in file_names - parsed_names])
+            parsed_names = set(file_names)
+            file_names = get_update_files(graph_classes, get_declared_classes(parser.all_files_info), file_names)
+        print(f"Files reparsed: {len(file_names)}")
+        graph_manager = KnowledgeGraphManager(uri, user, password, project_name, parser.all_files_info, batch_size, graph_manager.backend)
+        graph_manager.update_graph(sorted(file_names))
+    finally:
+        graph_manager.close()
+    manifest.save(hashes)   # only saved once the graph is updated, so a failed run is repeated the next time
+
 
 if __name__ == "__main__":
     uri = os.getenv("NEO4j_URI")
     username = os.getenv("NEO4j_USER") 
     password = os.getenv("NEO4j_PASSWORD")
     root_path = os.getenv("CDPKit_PATH")
+    batch_size = int(os.getenv("NEO4j_BATCH_SIZE", "1000"))    # rows per UNWIND statement
     cdp_folders = [root_path + "Chem",
                    root_path + "Pharm",
                    root_path + "Base", 
@@ -64,9 +257,30 @@ if __name__ == "__main__":
                    root_path + "Shape",
                    root_path + "Util",
                    root_path + "Vis"]
-    for folder in cdp_folders: 
-        all_files_info = DocParser(folder).parse_dir()
-        cdpkit_graph_manager = KnowledgeGraphManager(uri, username, password, project_name="CDPKit", info_dict=all_files_info)
-        cdpkit_graph_manager.create_graph()
-        cdpkit_graph_manager.close()
+    workers = int(os.getenv("DOCPARSER_WORKERS", os.cpu_count() or 1))  # processes that parse the files of all folders
+    cache_dir = os.getenv("DOCPARSER_CACHE_DIR")   # if set, unchanged files are loaded from the parse cache
+    manifest_path = os.getenv("KG_MANIFEST_PATH")   # if set, only the files that changed since the last run are reingested
+    export_dir = os.getenv("KG_EXPORT_DIR")    # if set, the graph is written as csv files for a cold build with the bulk importer
+    streaming = os.getenv("KG_STREAMING") == "1"  # if set, the files are written while the parser is still running
+    delta = os.getenv("KG_DELTA") == "1"  # if set, only the difference to the graph in the database is written
+    dry_run = os.getenv("KG_DRY_RUN") == "1"    # if set with KG_DELTA, the difference is only printed
+    chunk_files = int(os.getenv("KG_CHUNK_FILES", "0"))    # if set, a transaction is committed every this many files
+    chunk_rows = int(os.getenv("KG_CHUNK_ROWS", "50000"))   # or every this many rows
+    checkpoint_path = os.getenv("KG_CHECKPOINT_PATH")   # if set with KG_CHUNK_FILES, an interrupted build resumes after the last committed chunk
+    concurrency = int(os.getenv("KG_ASYNC_CONCURRENCY", "0"))   # if set, this many partitions are written concurrently by the async driver
+    if export_dir:
+        all_files_info = DocParser(root_path, {}, workers=workers, cache_dir=cache_dir).parse_dirs(cdp_folders)
+        node_files, relationship_files = BulkExporter(all_files_info, "CDPKit").export(export_dir)
+        print(BulkExporter.get_import_command(node_files, relationship_files))
+    elif manifest_path:
+        update_from_manifest(uri, username, password, "CDPKit", cdp_folders, manifest_path, batch_size, workers, cache_dir)
+    elif delta:
+        delta_graph(uri, username, password, "CDPKit", cdp_folders, batch_size, workers, cache_dir, dry_run)
+    elif concurrency:
+        async_graph(uri, username, password, "CDPKit", cdp_folders, batch_size, workers, cache_dir, concurrency)
+    elif streaming:
+        stream_graph(uri, username, password, "CDPKit", cdp_folders, batch_size, workers, cache_dir)
+    else:
+        build_graph(uri, username, password, "CDPKit", cdp_folders, batch_size, workers, cache_dir, 
+                    chunk_files=chunk_files, chunk_rows=chunk_rows, checkpoint_path=checkpoint_path)
 
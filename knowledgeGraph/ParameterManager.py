@@ -1,27 +1,32 @@
 from neo4j import Transaction
+from BatchWriter import BatchWriter
+from ApiModel import ParameterInfo, to_json
 
 class ParameterManager(): 
-    def _create_parameter_node(self, tx: Transaction, 
+    def _create_parameter_node(self, tx: Transaction, parameter_uid: str,
                                parameter_name: str, parameter_comment: str, parameter_type: str, parameter_default: str) -> None: 
         # creates the parameter node (if it does not already exist)
         query = """
-        MERGE (f:Parameter {name: $param_name, comment: $parameter_comment, type: $type_name, default: $default_value})
+        MERGE (f:Parameter {uid: $parameter_uid})
+        SET f.name = $param_name, f.comment = $parameter_comment, f.type = $type_name, f.default = $default_value
         RETURN f
         """
-        tx.run(query, param_name=parameter_name, parameter_comment=parameter_comment, type_name=parameter_type, default_value=parameter_default)
+        tx.run(query, parameter_uid=parameter_uid, param_name=parameter_name, parameter_comment=parameter_comment, type_name=parameter_type, default_value=parameter_default)
         
-    def _create_parameter_function_relationship(self, tx: Transaction, function_name: str, function_comment: str, 
-                                                parameter_dict: str, decorator_list: str, return_type: str, 
-                                                parameter_name: str, parameter_comment: str, parameter_type: str, parameter_default: str) -> None: 
+    def _create_parameter_function_relationship(self, tx: Transaction, function_uid: str, parameter_uid: str) -> None: 
         # creates the relationship between an input parameter and its function (if it does not already exist)
         query = """
-        MATCH (fo:Function {name: $function_name, comment: $function_comment, parameter: $parameter_dict, decorators: $decorator_list, returns: $return_type}), (fi:Parameter {name: $param_name, comment: $parameter_comment, type: $type_name, default: $default_value})
+        MATCH (fo:Function {uid: $function_uid}), (fi:Parameter {uid: $parameter_uid})
         MERGE (fo)-[:HAS]->(fi)
         """
-        tx.run(query,function_name=function_name, function_comment=function_comment, parameter_dict=parameter_dict, decorator_list=decorator_list, return_type=return_type, param_name=parameter_name, parameter_comment=parameter_comment, type_name=parameter_type, default_value=parameter_default)
+        tx.run(query, function_uid=function_uid, parameter_uid=parameter_uid)
 
-    def _parse_parameters(self, parameters: list) -> list: 
-        parameters_list = []
-        for p in parameters:
-            parameters_list.append({key: value for key,value in p.items()})
-        return parameters_list
\ No newline at end of file
+    def _get_parameter_properties(self, parameter: ParameterInfo) -> dict:
+        # the properties that are set on a parameter node
+        return {"name": parameter.name, "comment": parameter.comment,
+                "type": to_json(parameter.type), "default": to_json(parameter.default)}
+
+    def _collect_parameter(self, batch: BatchWriter, function_uid: str, parameter: ParameterInfo) -> None:
+        # collects the parameter node and its edge from the function
+        batch.add_node("Parameter", {"uid": parameter.uid}, self._get_parameter_properties(parameter))
+        batch.add_relationship("Function", {"uid": function_uid}, "HAS", "Parameter", {"uid": parameter.uid})
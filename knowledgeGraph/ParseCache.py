@@ -0,0 +1,53 @@
+import os
+import glob
+import pickle
+import hashlib
+import zlib
+
+class ParseCache():
+    # stores the parsed classes and functions of every file on disk, an entry is only used while the file and the parser are unchanged
+    def __init__(self, cache_dir: str, parser_version: int) -> None:
+        self.cache_dir = cache_dir  # one compressed pickle per parsed file
+        self.parser_version = parser_version    # entries of another parser version are ignored
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_entry_path(self, file_path: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest() + ".pickle")
+
+    def get_key(self, file_path: str, folder: str) -> tuple:
+        # the folder is part of the key, because the uids of the functions are qualified with it
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), folder, stat.st_mtime_ns, stat.st_size, self.parser_version)
+
+    def load(self, file_path: str, folder: str) -> tuple[bool, dict|None]:
+        # returns if there is a valid entry and the stored result, which is None for files that could not be parsed
+        entry_path = self.get_entry_path(file_path)
+        if not os.path.exists(entry_path):
+            return False, None
+        try:
+            with open(entry_path, "rb") as f:
+                key, file_info = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, ValueError):
+            return False, None  # a broken entry is treated like a missing one and overwritten
+        if key != self.get_key(file_path, folder):
+            return False, None
+        return True, file_info
+
+    def store(self, file_path: str, folder: str, file_info: dict|None) -> None:
+        data = zlib.compress(pickle.dumps((self.get_key(file_path, folder), file_info), protocol=pickle.HIGHEST_PROTOCOL))
+        entry_path = self.get_entry_path(file_path)
+        with open(entry_path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(entry_path + ".tmp", entry_path)
+
+    def invalidate(self, file_path: str|None = None) -> None:
+        # removes the entry of one file, or all entries if no file is given
+        entry_paths = [self.get_entry_path(file_path)] if file_path else glob.glob(os.path.join(self.cache_dir, "*.pickle"))
+        for entry_path in entry_paths:
+            if os.path.exists(entry_path):
+                os.remove(entry_path)
+
+    def size_report(self) -> dict:
+        # number of entries and the bytes they take on disk
+        entry_paths = glob.glob(os.path.join(self.cache_dir, "*.pickle"))
+        return {"entries": len(entry_paths), "bytes": sum(os.path.getsize(entry_path) for entry_path in entry_paths)}
@@ -1,13 +1,30 @@
+import uuid
 from neo4j import Driver, Transaction
+from BatchWriter import BatchWriter
+from GraphBackend import GraphBackend, as_backend
 
 class ProjectManager(): 
-    def __init__(self, driver: Driver, project_name: str) -> None:
+    VERSION_PROPERTY = "graph_version"  # changes with every write of the graph, the query caches of the RAG are dropped when it changes
+
+    def __init__(self, driver: Driver|GraphBackend, project_name: str, batch_size: int|None = None) -> None:
         self.project_name = project_name
-        self.driver = driver
+        self.backend = as_backend(driver, batch_size)   # a neo4j driver is wrapped in a Neo4jBackend
+        self.batch_size = batch_size    # if set, the node is written like the rows of the batched mode
     
-    def create_project(self) -> None:
-        with self.driver.session() as session:
-            session.execute_write(self._create_project_node, self.project_name)
+    def create_project(self) -> dict:
+        if self.batch_size:
+            batch = BatchWriter(self.batch_size)
+            batch.add_node("Project", {"name": self.project_name})
+            return self.backend.write(batch)
+        return self.backend.write_rows(self._create_project_node, self.project_name)
+
+    def stamp_version(self) -> str:
+        # sets a new graph version on the project node, has to be called after the graph was written
+        version = uuid.uuid4().hex
+        batch = BatchWriter(self.batch_size or 1)
+        batch.add_node("Project", {"name": self.project_name}, {self.VERSION_PROPERTY: version})
+        self.backend.write(batch)
+        return version
 
     def _create_project_node(self, tx: Transaction, project_name: str) -> None:
         # Creates the project node if it does not already exist
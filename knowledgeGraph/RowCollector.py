@@ -0,0 +1,26 @@
+from BatchWriter import BatchWriter
+from FolderManager import FolderManager
+from FileManager import FileManager
+from ClassManager import ClassManager
+from FunctionManager import FunctionManager
+from SymbolTable import SymbolTable
+
+
+class RowCollector():
+    # collects the rows of all stages of an info dict into one BatchWriter, like the managers do in batched mode
+    def __init__(self, info_dict: dict, project_name: str, batch_size: int = 1000, symbol_table: SymbolTable|None = None) -> None:
+        self.info_dict = info_dict  # dict from DocParser
+        self.project_name = project_name
+        self.batch_size = batch_size
+        self.symbol_table = symbol_table or SymbolTable(info_dict)  # the table of all files if the info dict is only a chunk of them
+
+    def collect_rows(self, batch: BatchWriter|None = None) -> BatchWriter:
+        # the BatchWriter writes all nodes before the relationships, so the rows of all stages can go into one transaction
+        # the rows are added to the given batch, e.g. to fill one batch from several files
+        batch = batch or BatchWriter(self.batch_size)
+        batch.add_node("Project", {"name": self.project_name})
+        FolderManager(None, self.info_dict, self.project_name)._collect_folders(batch)
+        FileManager(None, self.info_dict)._collect_files(batch)
+        ClassManager(None, self.info_dict, symbol_table=self.symbol_table)._collect_classes(batch)
+        FunctionManager(None, self.info_dict, symbol_table=self.symbol_table)._collect_functions(batch)
+        return batch
@@ -0,0 +1,57 @@
+from neo4j import Driver, Transaction
+
+class SchemaManager():
+    # labels whose nodes are merged on a unique property
+    UNIQUE_KEYS = {"Project": "name", "Folder": "name", "File": "name", "Class": "name", "Decorator": "name",
+                   "Function": "uid", "Parameter": "uid"}
+    # labels whose nodes are not unique by name, but are looked up by it during the retrieval
+    INDEXED_KEYS = {"Function": "name", "Parameter": "name"}
+
+    def __init__(self, driver: Driver) -> None:
+        self.driver = driver
+
+    def create_schema(self) -> None:
+        # creates the constraints and indexes (if they do not already exist) and waits until they can be used
+        with self.driver.session() as session:
+            for label, key in SchemaManager.UNIQUE_KEYS.items():
+                session.execute_write(self._create_unique_constraint, label, key)
+            for label, key in SchemaManager.INDEXED_KEYS.items():
+                session.execute_write(self._create_index, label, key)
+            session.run("CALL db.awaitIndexes(300)").consume()
+
+    def get_indexes(self) -> list:
+        # returns the indexes that exist in the database, the uniqueness constraints are backed by an index as well
+        with self.driver.session() as session:
+            return session.execute_read(self._get_indexes)
+
+    def report_indexes(self) -> None:
+        # prints the existing indexes, the retrieval queries on these labels and properties use index seeks
+        for index in self.get_indexes():
+            print(f"Index {index['name']} on {index['labelsOrTypes']} {index['properties']}: {index['state']}")
+
+    @staticmethod
+    def _create_unique_constraint(tx: Transaction, label: str, key: str) -> None:
+        # creates a uniqueness constraint for the key of the label (if it does not already exist)
+        query = f"""
+        CREATE CONSTRAINT {label.lower()}_{key}_unique IF NOT EXISTS
+        FOR (n:{label}) REQUIRE n.{key} IS UNIQUE
+        """
+        tx.run(query)
+
+    @staticmethod
+    def _create_index(tx: Transaction, label: str, key: str) -> None:
+        # creates an index for the key of the label (if it does not already exist)
+        query = f"""
+        CREATE INDEX {label.lower()}_{key}_index IF NOT EXISTS
+        FOR (n:{label}) ON (n.{key})
+        """
+        tx.run(query)
+
+    @staticmethod
+    def _get_indexes(tx: Transaction) -> list:
+        query = """
+        SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state
+        WHERE type <> 'LOOKUP'
+        RETURN name, type, labelsOrTypes, properties, state
+        """
+        return [record.data() for record in tx.run(query)]
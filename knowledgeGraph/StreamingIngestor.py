@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+from BatchWriter import BatchWriter
+from RowCollector import RowCollector
+from GraphBackend import GraphBackend
+from SymbolTable import SymbolTable
+
+
+class StreamingIngestor():
+    # writes parsed files to the graph while the parser is still running
+    # the parser puts chunks of files into a bounded queue and writer threads commit every chunk in its own transaction
+    # bases and types declared in later chunks are not known yet when a chunk is written, their edges are written after the last chunk
+    def __init__(self, backend: GraphBackend, project_name: str, batch_size: int = 1000, writers: int = 2,
+                 queue_size: int = 8, chunk_files: int = 20) -> None:
+        self.backend = backend    # shared by the writer threads, the Neo4j backend opens a session per chunk
+        self.project_name = project_name
+        self.batch_size = batch_size
+        self.writers = writers  # number of writer threads
+        self.queue = queue.Queue(maxsize=queue_size)    # at most queue_size chunks wait in memory, the parser blocks when it is full
+        self.chunk_files = chunk_files  # files per chunk and transaction
+        self.symbol_table = SymbolTable(defer=True)   # the classes of all chunks that were queued so far, later chunks resolve the earlier references
+        self.stats = {"chunks": 0, "files": 0, "unreadable files": 0, "rows": 0, "queries": 0, "deferred relationships": 0}
+        self.stats_lock = threading.Lock()
+        self.errors = []
+
+    def ingest(self, records) -> dict:
+        # consumes the (file path, folder, file info) records of DocParser.iter_jobs and returns the stats of the writes
+        threads = [threading.Thread(target=self._write_chunks, daemon=True) for _ in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        try:
+            chunk, chunk_size = {}, 0
+            for file_path, folder, file_info in records:
+                if file_info is None:
+                    self.stats["unreadable files"] += 1
+                    continue
+                chunk.setdefault(folder, {})[os.path.basename(file_path)] = file_info
+                chunk_size += 1
+                if chunk_size == self.chunk_files:
+                    self._put_chunk(chunk, chunk_size)
+                    chunk, chunk_size = {}, 0
+            if chunk_size:
+                self._put_chunk(chunk, chunk_size)
+        finally:
+            for _ in threads:
+                self.queue.put(None)    # tells every writer to stop
+            for thread in threads:
+                thread.join()
+        if self.errors:
+            raise self.errors[0]
+        self._write_deferred()
+        return self.stats
+
+    def _put_chunk(self, chunk: dict, chunk_size: int) -> None:
+        self.symbol_table.add_info_dict(chunk)  # before queueing, so a chunk always resolves its own classes
+        self.queue.put((chunk, chunk_size))
+
+    def _write_deferred(self) -> None:
+        # writes the edges to the bases and types whose classes were only declared in a later chunk
+        batch, relationship_count = BatchWriter(self.batch_size), 0
+        for source_label, source_key, relationship_type, class_name in self.symbol_table.resolve_pending():
+            batch.add_node("Class", {"name": class_name})
+            batch.add_relationship(source_label, source_key, relationship_type, "Class", {"name": class_name})
+            relationship_count += 1
+        if relationship_count:
+            batch_stats = self.backend.write(batch)
+            self.stats["deferred relationships"] = relationship_count
+            self.stats["rows"] += batch_stats["rows"]
+            self.stats["queries"] += batch_stats["queries"]
+
+    def _write_chunks(self) -> None:
+        # writer thread, keeps taking chunks after an error, so that the parser is never blocked by a full queue
+        while (item := self.queue.get()) is not None:
+            if self.errors:
+                continue
+            chunk, chunk_size = item
+            try:
+                batch = RowCollector(chunk, self.project_name, self.batch_size, self.symbol_table).collect_rows()
+                batch_stats = self.backend.write(batch)
+            except Exception as e:
+                self.errors.append(e)
+                continue
+            with self.stats_lock:
+                self.stats["chunks"] += 1
+                self.stats["files"] += chunk_size
+                self.stats["rows"] += batch_stats["rows"]
+                self.stats["queries"] += batch_stats["queries"]
@@ -0,0 +1,75 @@
+import json
+import threading
+from ApiModel import ClassInfo
+from GraphBackend import GraphBackend
+
+
+class SymbolTable():
+    # maps the qualified and unqualified names of all declared classes to the name of their Class node
+    # base classes and parameter types are resolved with it, names that are not declared (builtins like int, Boost.Python.instance)
+    # are recorded as unresolved instead of being written as Class nodes
+    def __init__(self, info_dict: dict|None = None, defer: bool = False) -> None:
+        self.names = {}     # e.g. Atom, Chem.Atom and CDPL.Chem.Atom -> Atom
+        self.unresolved = {}    # name -> number of references that could not be resolved
+        self.defer = defer  # if set, the unresolved references are kept for resolve_pending, only the streaming mode needs them
+        self.unresolved_references = []     # (source label, source key, relationship type, name) of the unresolved references
+        self.lock = threading.Lock()    # the streaming mode resolves from several writer threads
+        if info_dict:
+            self.add_info_dict(info_dict)
+
+    def add_info_dict(self, info_dict: dict) -> None:
+        for folder, files_info in info_dict.items():
+            for file_info in files_info.values():
+                for c in file_info["classes"]:
+                    self.add_class(c, [folder])
+
+    def add_class(self, c: ClassInfo, scope: list) -> None:
+        # registers every suffix of CDPL.<folder>.<outer classes>.<name>, nested classes are registered with their outer classes
+        self.add_path(["CDPL"] + scope + [c.name])
+        for nc in c.nested_classes:
+            self.add_class(nc, scope + [c.name])
+
+    def add_path(self, path: list) -> None:
+        for i in range(len(path)):
+            self.names[".".join(path[i:])] = path[-1]
+
+    def add_graph_classes(self, backend: GraphBackend) -> None:
+        # registers the classes that are already in the graph, e.g. of the files that an update does not reparse
+        for record in backend.read_graph_classes():
+            self.add_path(["CDPL", record["folder"], record["name"]])
+            for names in record["nested"]:  # the chains start with the top-level class
+                self.add_path(["CDPL", record["folder"]] + names)
+
+    def resolve(self, name, source_label: str, source_key: dict, relationship_type: str) -> str|None:
+        # returns the name of the Class node of a base or type, or None if it is not declared in any parsed folder
+        if isinstance(name, str) and name in self.names:
+            return self.names[name]
+        if name != "No value":  # no annotation at all is not worth recording
+            key = name if isinstance(name, str) else json.dumps(name)   # calls like {"callable": ..., "arguments": [...]}
+            with self.lock:
+                self.unresolved[key] = self.unresolved.get(key, 0) + 1
+                if self.defer:
+                    self.unresolved_references.append((source_label, source_key, relationship_type, name))
+        return None
+
+    def resolve_pending(self) -> list:
+        # resolves the recorded references again, e.g. after the streaming mode has seen the classes of later files,
+        # returns the (source label, source key, relationship type, class name) of the newly resolved ones
+        resolved, pending = [], []
+        with self.lock:
+            for source_label, source_key, relationship_type, name in self.unresolved_references:
+                if isinstance(name, str) and name in self.names:
+                    resolved.append((source_label, source_key, relationship_type, self.names[name]))
+                    self.unresolved[name] -= 1
+                    if not self.unresolved[name]:
+                        del self.unresolved[name]
+                else:
+                    pending.append((source_label, source_key, relationship_type, name))
+            self.unresolved_references = pending
+        return resolved
+
+    def report(self, top: int = 10) -> None:
+        # prints the most frequent names that could not be resolved
+        print(f"Unresolved bases and types: {len(self.unresolved)} names, {sum(self.unresolved.values())} references")
+        for name, count in sorted(self.unresolved.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {name}: {count}")
@@ -1,12 +1,16 @@
 from neo4j import Transaction
+from BatchWriter import BatchWriter
 
 class TypeManager(): 
-    def _create_type_relationship(self, tx: Transaction, 
-                                  parameter_name: str, parameter_comment: str, parameter_type: str, parameter_default: str, 
-                                  type_name: str) -> None:
+    def _create_type_relationship(self, tx: Transaction, parameter_uid: str, type_name: str) -> None:
         # creates the relationship between a parameter and its type (if it does not already exist)
         query = """
-        MATCH (fo:Parameter {name: $param_name, comment: $parameter_comment, type: $parameter_type, default: $default_value}), (fi:Class {name: $type_name})
+        MATCH (fo:Parameter {uid: $parameter_uid}), (fi:Class {name: $type_name})
         MERGE (fo)-[:OF_TYPE]->(fi)
         """
-        tx.run(query, param_name=parameter_name, parameter_comment=parameter_comment, parameter_type=parameter_type, type_name=type_name, default_value=parameter_default)
\ No newline at end of file
+        tx.run(query, parameter_uid=parameter_uid, type_name=type_name)
+
+    def _collect_type(self, batch: BatchWriter, parameter_uid: str, type_name: str) -> None:
+        # collects the class node of the resolved type and its edge from the parameter
+        batch.add_node("Class", {"name": type_name})
+        batch.add_relationship("Parameter", {"uid": parameter_uid}, "OF_TYPE", "Class", {"name": type_name})
@@ -0,0 +1,94 @@
+import os
+import sys
+import pytest
+
+# the modules of the knowledgeGraph are imported by their bare names, like the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DocParser import DocParser
+
+# a small documentation tree in the format of the CDPKit Python-API sources
+DOC_FILES = {
+    "Chem/Atom.doc.py": '''
+##
+# \\brief An atom.
+#
+class Atom(Boost.Python.instance):
+
+    ##
+    # \\brief Constructs an atom.
+    #
+    def __init__(self: object) -> None: pass
+
+    ##
+    # \\brief Returns the bond at the index.
+    # \\param index The index.
+    #
+    def getBond(self: Atom, index: int = 0) -> Bond: pass
+
+    ##
+    # \\brief The type of an atom.
+    #
+    class Type(Boost.Python.enum):
+
+        ##
+        # \\brief
+        #
+        UNKNOWN = 0
+''',
+    "Chem/Bond.doc.py": '''
+##
+# \\brief A bond.
+#
+class Bond(Boost.Python.instance):
+
+    ##
+    # \\brief Returns the first atom.
+    # \\param atom The other atom.
+    #
+    def getAtom(self: Bond, atom: Chem.Atom) -> Atom: pass
+
+    ##
+    # \\brief The type of a bond.
+    #
+    class Type(Boost.Python.enum):
+
+        ##
+        # \\brief
+        #
+        UNKNOWN = 0
+
+##
+# \\brief Returns the order of a bond.
+# \\param bond The bond.
+#
+def getOrder(bond: Bond) -> int: pass
+''',
+    "Pharm/Feature.doc.py": '''
+##
+# \\brief A pharmacophore feature.
+#
+class Feature(Chem.Atom):
+
+    ##
+    # \\brief Constructs a feature of an atom.
+    # \\param atom The atom.
+    #
+    def __init__(self: object, atom: CDPL.Chem.Atom) -> None: pass
+''',
+}
+
+
+@pytest.fixture
+def dir_paths(tmp_path) -> list:
+    # writes the documentation tree and returns its folders
+    for relative_path, content in DOC_FILES.items():
+        file_path = tmp_path / "CDPL" / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+    return [str(tmp_path / "CDPL" / "Chem"), str(tmp_path / "CDPL" / "Pharm")]
+
+
+@pytest.fixture
+def info_dict(dir_paths) -> dict:
+    return DocParser("", {}).parse_dirs(dir_paths)
@@ -0,0 +1,63 @@
+import os
+import csv
+from BulkExporter import BulkExporter
+from GraphBackend import InMemoryBackend
+from KnowledgeGraphManager import KnowledgeGraphManager
+from ProjectManager import ProjectManager
+
+
+def read_csv(file_path: str) -> tuple[list, list]:
+    with open(file_path, newline="") as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+
+def read_export(node_files: list, relationship_files: list) -> tuple[dict, dict]:
+    # reads the exported files back into the format of InMemoryBackend.get_graph
+    nodes = {}
+    for file_path in node_files:
+        header, rows = read_csv(file_path)
+        id_name, label = header[0].split(":ID(")[0], header[0].split(":ID(")[1].rstrip(")")
+        for row in rows:
+            assert row[-1] == label
+            properties = dict(zip([id_name] + header[1:-1], row[:-1]))
+            assert properties[id_name] not in nodes.get(label, {})     # every node is exported once
+            nodes.setdefault(label, {})[properties[id_name]] = properties
+    relationships = {}
+    for file_path in relationship_files:
+        header, rows = read_csv(file_path)
+        source_label, target_label = header[0][len(":START_ID("):-1], header[1][len(":END_ID("):-1]
+        for source_id, target_id, relationship_type in rows:
+            pairs = relationships.setdefault((source_label, relationship_type, target_label), set())
+            assert (source_id, target_id) not in pairs  # and every relationship
+            pairs.add((source_id, target_id))
+    return nodes, relationships
+
+
+def test_export_headers(info_dict, tmp_path):
+    node_files, relationship_files = BulkExporter(info_dict, "CDPKit").export(str(tmp_path / "export"))
+    for file_path in node_files:
+        header, _ = read_csv(file_path)
+        label = os.path.basename(file_path).split("_")[1]
+        assert header[0] in (f"name:ID({label})", f"uid:ID({label})")
+        assert header[-1] == ":LABEL"
+    for file_path in relationship_files:
+        header, rows = read_csv(file_path)
+        name, source_label, target_label = os.path.basename(file_path)[:-len(".csv")].rsplit("_", 2)
+        relationship_type = name[len("relationships_"):]    # the types may contain underscores, the labels do not
+        assert header == [f":START_ID({source_label})", f":END_ID({target_label})", ":TYPE"]
+        assert {row[2] for row in rows} == {relationship_type}
+
+
+def test_export_matches_written_graph(info_dict, tmp_path):
+    # the managers write to the in-memory backend with the MERGE semantics of the database
+    backend = InMemoryBackend()
+    KnowledgeGraphManager(None, None, None, "CDPKit", info_dict, 1000, backend).create_graph()
+    written_nodes, written_relationships = backend.get_graph()
+    written_nodes["Project"] = {name: {k: v for k, v in properties.items() if k != ProjectManager.VERSION_PROPERTY}
+                                for name, properties in written_nodes["Project"].items()}  # stamped after the write
+
+    nodes, relationships = read_export(*BulkExporter(info_dict, "CDPKit").export(str(tmp_path / "export")))
+    assert nodes == written_nodes
+    assert relationships == written_relationships
+    assert set(nodes["Class"]) == {"Atom", "Bond", "Feature", "Type"}    # the nested Type classes of Atom and Bond are one node
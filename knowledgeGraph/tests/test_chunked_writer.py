@@ -0,0 +1,35 @@
+import copy
+import ChunkedWriter as chunked_writer
+from ChunkedWriter import ChunkedWriter
+from GraphBackend import InMemoryBackend
+
+
+def get_fingerprint(info_dict: dict) -> str:
+    return ChunkedWriter(InMemoryBackend(), info_dict, "CDPKit", chunk_files=1).get_fingerprint()
+
+
+def test_fingerprint_is_stable(info_dict):
+    assert get_fingerprint(info_dict) == get_fingerprint(copy.deepcopy(info_dict))
+
+
+def test_fingerprint_changes_with_file_content(info_dict):
+    changed = copy.deepcopy(info_dict)
+    changed["Chem"]["Atom.doc.py"]["classes"][0].comment = "changed"
+    assert get_fingerprint(changed) != get_fingerprint(info_dict)
+
+
+def test_fingerprint_changes_with_parser_version(info_dict, monkeypatch):
+    fingerprint = get_fingerprint(info_dict)
+    monkeypatch.setattr(chunked_writer, "PARSER_VERSION", chunked_writer.PARSER_VERSION + 1)
+    assert get_fingerprint(info_dict) != fingerprint
+
+
+def test_checkpoint_of_changed_files_is_ignored(info_dict, tmp_path):
+    # a run that was interrupted before the files changed must not skip the chunks of the old content
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    old = copy.deepcopy(info_dict)
+    old["Chem"]["Atom.doc.py"]["classes"][0].comment = "old"
+    ChunkedWriter(InMemoryBackend(), old, "CDPKit", chunk_files=1, checkpoint_path=checkpoint_path).save_checkpoint(
+        get_fingerprint(old), 3)
+    stats = ChunkedWriter(InMemoryBackend(), info_dict, "CDPKit", chunk_files=1, checkpoint_path=checkpoint_path).write()
+    assert stats["skipped chunks"] == 0 and stats["chunks"] == 3
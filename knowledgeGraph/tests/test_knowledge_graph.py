@@ -0,0 +1,80 @@
+import time
+import pytest
+from GraphBackend import GraphBackend, InMemoryBackend
+from KnowledgeGraphManager import KnowledgeGraphManager
+from StreamingIngestor import StreamingIngestor
+from ProjectManager import ProjectManager
+
+
+def build(info_dict: dict, backend: InMemoryBackend) -> tuple[dict, dict]:
+    KnowledgeGraphManager(None, None, None, "CDPKit", info_dict, 1000, backend).create_graph()
+    nodes, relationships = backend.get_graph()
+    for properties in nodes["Project"].values():
+        properties.pop(ProjectManager.VERSION_PROPERTY)     # a new version is stamped by every build
+    return nodes, relationships
+
+
+def test_nodes(info_dict):
+    nodes, _ = build(info_dict, InMemoryBackend())
+    assert set(nodes["Project"]) == {"CDPKit"}
+    assert set(nodes["Folder"]) == {"Chem", "Pharm"}
+    assert set(nodes["Class"]) == {"Atom", "Bond", "Feature", "Type"}    # the nested Type classes of Atom and Bond are one node
+    assert {properties["name"] for properties in nodes["Function"].values()} == {"__init__", "getBond", "getAtom", "getOrder"}
+    assert len(nodes["Function"]) == 5  # the uid keeps the constructors of Atom and Feature apart
+
+
+def test_relationships(info_dict):
+    nodes, relationships = build(info_dict, InMemoryBackend())
+    assert relationships[("Class", "INHERITS_FROM", "Class")] == {("Feature", "Atom")}     # the bases outside the project are not linked
+    assert relationships[("Class", "HAS", "Class")] == {("Atom", "Type"), ("Bond", "Type")}
+    parameter_types = {(nodes["Parameter"][uid]["name"], target) for uid, target in relationships[("Parameter", "OF_TYPE", "Class")]}
+    assert parameter_types == {("self", "Atom"), ("self", "Bond"), ("atom", "Atom"), ("bond", "Bond")}
+    assert relationships[("File", "INCLUDED_IN", "Folder")] == {("Atom.doc.py", "Chem"), ("Bond.doc.py", "Chem"), ("Feature.doc.py", "Pharm")}
+    assert relationships[("Folder", "INCLUDED_IN", "Project")] == {("Chem", "CDPKit"), ("Pharm", "CDPKit")}
+    for (source_label, _, target_label), pairs in relationships.items():
+        for source_id, target_id in pairs:  # no relationship points to a node that was not written
+            assert source_id in nodes[source_label] and target_id in nodes[target_label]
+
+
+def test_build_is_idempotent(info_dict):
+    backend = InMemoryBackend()
+    first = build(info_dict, backend)
+    assert build(info_dict, backend) == first
+
+
+def test_streaming_resolves_classes_of_later_chunks(info_dict):
+    # Feature inherits from Atom and takes an Atom, getAtom of Bond too, all are written before the chunk of Atom is parsed
+    backend = InMemoryBackend()
+    ProjectManager(backend, "CDPKit", 1000).create_project()
+    ingestor = StreamingIngestor(backend, "CDPKit", 1000, writers=1, queue_size=1, chunk_files=1)
+
+    def records():
+        for i, (folder, file_name) in enumerate([("Pharm", "Feature.doc.py"), ("Chem", "Bond.doc.py"), ("Chem", "Atom.doc.py")]):
+            while ingestor.stats["chunks"] < i:     # the next file is only parsed after the earlier ones were written
+                time.sleep(0.001)
+            yield f"{folder}/{file_name}", folder, info_dict[folder][file_name]
+
+    stats = ingestor.ingest(records())
+    assert stats["deferred relationships"] == 3
+    nodes, relationships = backend.get_graph()
+    built_nodes, built_relationships = build(info_dict, InMemoryBackend())
+    assert relationships == built_relationships
+    # the shared Type node gets the comment of the file that is written last, so only the node ids are compared
+    assert {label: set(label_nodes) for label, label_nodes in nodes.items()} == {label: set(label_nodes) for label, label_nodes in built_nodes.items()}
+
+
+def test_in_memory_backend_needs_batch_size(info_dict):
+    backend = InMemoryBackend()
+    with pytest.raises(ValueError):
+        KnowledgeGraphManager(None, None, None, "CDPKit", info_dict, None, backend)
+    assert backend.get_graph() == ({}, {})   # refused before the project node is written
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        GraphBackend()
+
+
+def test_in_memory_backend_has_no_per_row_mode():
+    with pytest.raises(ValueError):
+        InMemoryBackend().write_rows(lambda tx: None)
@@ -0,0 +1,34 @@
+from GraphBackend import InMemoryBackend
+from KnowledgeGraphManager import KnowledgeGraphManager
+from SymbolTable import SymbolTable
+
+
+def test_graph_classes_match_parsed_classes(info_dict):
+    backend = InMemoryBackend()
+    KnowledgeGraphManager(None, None, None, "CDPKit", info_dict, 1000, backend).create_graph()
+    symbol_table = SymbolTable()
+    symbol_table.add_graph_classes(backend)
+    assert symbol_table.names == SymbolTable(info_dict).names
+
+
+def test_outer_class_of_nested_classes_is_registered(info_dict):
+    # Atom has the nested class Type, it is registered itself and not only as the start of Atom.Type
+    backend = InMemoryBackend()
+    KnowledgeGraphManager(None, None, None, "CDPKit", info_dict, 1000, backend).create_graph()
+    symbol_table = SymbolTable()
+    symbol_table.add_graph_classes(backend)
+    for name in ["Atom", "Chem.Atom", "CDPL.Chem.Atom"]:
+        assert symbol_table.names[name] == "Atom"
+    assert symbol_table.names["Chem.Atom.Type"] == "Type"
+
+
+def test_references_are_only_kept_when_deferred(info_dict):
+    symbol_table = SymbolTable(info_dict)
+    assert symbol_table.resolve("int", "Parameter", {"uid": "1"}, "OF_TYPE") is None
+    assert symbol_table.unresolved == {"int": 1} and symbol_table.unresolved_references == []
+
+    deferred = SymbolTable(defer=True)  # the streaming mode sees the classes of later files after their references
+    assert deferred.resolve("Chem.Atom", "Parameter", {"uid": "1"}, "OF_TYPE") is None
+    deferred.add_info_dict(info_dict)
+    assert deferred.resolve_pending() == [("Parameter", {"uid": "1"}, "OF_TYPE", "Atom")]
+    assert deferred.unresolved == {} and deferred.unresolved_references == []
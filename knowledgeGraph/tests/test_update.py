@@ -0,0 +1,66 @@
+import os
+from DocParser import DocParser
+from GraphBackend import InMemoryBackend
+from KnowledgeGraphManager import KnowledgeGraphManager, update_from_manifest, get_update_files
+from ProjectManager import ProjectManager
+
+
+def get_graph(backend: InMemoryBackend) -> tuple[dict, dict]:
+    nodes, relationships = backend.get_graph()
+    for properties in nodes.get("Project", {}).values():
+        properties.pop(ProjectManager.VERSION_PROPERTY, None)
+    return nodes, relationships
+
+
+def build(dir_paths: list) -> tuple[dict, dict]:
+    backend = InMemoryBackend()
+    KnowledgeGraphManager(None, None, None, "CDPKit", DocParser("", {}).parse_dirs(dir_paths), 1000, backend).create_graph()
+    return get_graph(backend)
+
+
+def edit(file_path: str, old: str, new: str) -> None:
+    with open(file_path) as f:
+        content = f.read()
+    assert old in content
+    with open(file_path, "w") as f:
+        f.write(content.replace(old, new))
+
+
+def update(dir_paths: list, manifest_path: str, backend: InMemoryBackend) -> None:
+    update_from_manifest(None, None, None, "CDPKit", dir_paths, manifest_path, 1000, backend=backend)
+
+
+def test_update_files_include_shared_classes():
+    graph_classes = {"Atom.doc.py": {"Atom", "Type"}, "Bond.doc.py": {"Bond", "Type"}, "Feature.doc.py": {"Feature"}}
+    assert get_update_files(graph_classes, {}, {"Atom.doc.py"}) == {"Atom.doc.py", "Bond.doc.py"}
+    assert get_update_files(graph_classes, {}, {"Feature.doc.py"}) == {"Feature.doc.py"}
+    # a class that the changed file declares now
+    assert get_update_files(graph_classes, {"Feature.doc.py": {"Feature", "Type"}}, {"Feature.doc.py"}) == set(graph_classes)
+
+
+def test_update_equals_full_build(dir_paths, tmp_path):
+    # the nested Type of Bond has a method, which hangs at the Type node that Atom.doc.py declares as well
+    atom_path, bond_path = os.path.join(dir_paths[0], "Atom.doc.py"), os.path.join(dir_paths[0], "Bond.doc.py")
+    edit(bond_path, "    class Type(Boost.Python.enum):\n", "    class Type(Boost.Python.enum):\n\n"
+                                                            "        ##\n        # \\brief Returns the name.\n        #\n"
+                                                            "        def getName(self: Type) -> str: pass\n")
+    manifest_path, backend = str(tmp_path / "manifest.json"), InMemoryBackend()
+    update(dir_paths, manifest_path, backend)   # the first run adds every file
+    assert get_graph(backend) == build(dir_paths)
+
+    edit(atom_path, "Returns the bond at the index.", "Returns a bond.")
+    update(dir_paths, manifest_path, backend)
+    nodes, relationships = get_graph(backend)
+    assert "getName" in {properties["name"] for properties in nodes["Function"].values()}
+    assert (nodes, relationships) == build(dir_paths)
+
+
+def test_update_of_removed_class_equals_full_build(dir_paths, tmp_path):
+    # Feature inherits from Atom and getAtom of Bond takes an Atom, these edges go with the class
+    manifest_path, backend = str(tmp_path / "manifest.json"), InMemoryBackend()
+    update(dir_paths, manifest_path, backend)
+    os.remove(os.path.join(dir_paths[0], "Atom.doc.py"))
+    update(dir_paths, manifest_path, backend)
+    nodes, relationships = get_graph(backend)
+    assert "Atom" not in nodes["Class"]
+    assert (nodes, relationships) == build(dir_paths)